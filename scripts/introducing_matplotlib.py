@@ -61,17 +61,26 @@ plt.plot("high", "low", "or", data=fb.head(20))
 
 # %%
 quakes = pd.read_csv("../data/earthquakes.csv")
-plt.hist(quakes.query('magType == "ml"').mag)
+x = quakes.query('magType == "ml"').mag
+plt.hist(x)
 
 # %% [markdown]
 # ### Bin size matters
 # Notice how our assumptions of the distribution of the data can change based on the number of bins (look at the drop between the two highest peaks on the righthand plot):
 
+# %% [markdown]
+# Since 35 bins split each of 7 bins into 5, we can count the finer bins once with `grouped_histogram()` (from `src/`) and add up neighboring bins for the coarser histogram instead of rereading the data:
+
 # %%
-x = quakes.query('magType == "ml"').mag
+import sys
+
+sys.path.append("../src/")
+from grouped_stats import grouped_histogram
+
+ml_histogram = grouped_histogram(x, bins=35)
 fig, axes = plt.subplots(1, 2, figsize=(10, 3))
 for ax, bins in zip(axes, [7, 35]):
-    ax.hist(x, bins=bins)
+    ml_histogram.coarsen(35 // bins).plot(ax=ax, alpha=1, legend=False)
     ax.set_title(f"bins param: {bins}")
 
 # %% [markdown]
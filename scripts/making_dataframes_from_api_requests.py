@@ -63,8 +63,48 @@ earthquake_properties_data = [
 df = pd.DataFrame(earthquake_properties_data)
 df.head()
 
+# %% [markdown]
+# This drops each event's `id` and the coordinates stored in its `geometry`. `usgs.flatten_features()` (from `src/`) keeps those as `id`, `longitude`, `latitude` and `depth` columns, and builds every column with a fixed data type directly from the JSON:
+
+# %%
+import sys
+
+sys.path.append("../src/")
+import usgs
+
+df = usgs.flatten_features(earthquake_json)
+df.head()
+
+# %% [markdown]
+# ### (Optional) Fetch a Longer Time Range
+# The API limits how many events a single query can return, so for longer time ranges `usgs.fetch_earthquakes()` splits the range into weekly windows (halving any window that still matches too many events) and requests several of them at once. Passing a `usgs.ResponseCache` saves the responses to disk, so running this cell again for the same range doesn't download everything again:
+
+# %%
+df = usgs.fetch_earthquakes(
+    yesterday - dt.timedelta(days=90), yesterday, cache=usgs.ResponseCache(".cache/usgs")
+)
+df.shape
+
 # %% [markdown]
 # ### (Optional) Write Data to CSV
 
 # %%
 df.to_csv("earthquakes.csv", index=False)
+
+# %% [markdown]
+# The next time we run this, we don't need to download the whole time range again: `usgs.update_store()` asks the API only for events updated since the newest one in our file and merges them in, replacing older versions of revised events:
+
+# %%
+df = usgs.update_store("earthquakes.csv")
+df.shape
+
+# %% [markdown]
+# ### (Optional) Keep an Event Store
+# Instead of overwriting a CSV file, an `EventStore` (from `src/`) keeps one Parquet file per day keyed by event `id`. Adding revised events replaces the older versions, and queries only read the days that can contain matching events:
+
+# %%
+from event_store import EventStore
+
+store = EventStore("earthquake_store")
+store.upsert(df)
+store.query(start=yesterday - dt.timedelta(days=7), mag_type="ml").head()
@@ -1,10 +1,15 @@
 # %%
+import sys
+
 import pandas as pd
 
+sys.path.append("../src/")
+import readers
+
 print(pd.__version__)
 
 # %%
-disengagements = pd.read_excel(
+disengagements = readers.read_excel(
     "../data/cassi-autonomous-shuttle/autonomous_shuttle_disengagement.xlsx",
     usecols=[
         "Incident Datetime",
@@ -25,8 +30,14 @@ disengagements.dtypes
 disengagements["Incident Datetime"] = pd.to_datetime(
     disengagements["Incident Datetime"], utc=True
 )
-disengagements["Initiated by"] = disengagements["Initiated by"].astype("category")
-disengagements["Cause"] = disengagements["Cause"].astype("category")
+disengagements.dtypes
+
+# %%
+from encoding import CategoricalEncoder
+
+# learn the categories once; `category_encoder.save()` keeps them for later runs
+category_encoder = CategoricalEncoder().fit(disengagements, ["Initiated by", "Cause"])
+disengagements = category_encoder.transform(disengagements)
 disengagements.dtypes
 
 # %%
@@ -57,11 +68,17 @@ disengagements_datetime_is_index
 disengagements_datetime_is_index.dtypes
 
 # %%
-one_hot = disengagements_datetime_is_index.Weather.str.get_dummies(sep=";")
-one_hot
+from encoding import MultiLabelEncoder
+
+weather_encoder = MultiLabelEncoder(sep=";").fit(
+    disengagements_datetime_is_index.Weather
+)
+weather_encoder.vocabulary
 
 # %%
-one_hot.columns = "Weather_" + one_hot.columns
+one_hot = weather_encoder.transform_frame(
+    disengagements_datetime_is_index.Weather, prefix="Weather_"
+)
 one_hot
 
 # %%
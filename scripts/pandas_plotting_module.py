@@ -8,26 +8,31 @@
 # ## Setup
 
 # %%
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+sys.path.append("../src/")
+
 fb = pd.read_csv("../data/fb_stock_prices_2018.csv", index_col="date", parse_dates=True)
 
 # %% [markdown]
 # ## Scatter matrix
-# Easily create scatter plots between all columns in the dataset:
+# Easily create scatter plots between all columns in the dataset. Rather than drawing every point in every subplot, `pair_summary()` (from `src/`) bins each column once and counts every pair of columns into a 2D histogram, which is what we see off the diagonal (darker cells have more points); a sample of the points can be drawn instead with `kind="scatter"`:
 
 # %%
-from pandas.plotting import scatter_matrix
+from pairplot import pair_summary
 
-scatter_matrix(fb, figsize=(10, 10))
+fb_pairs = pair_summary(fb)
+fb_pairs.plot(figsize=(10, 10))
 
 # %% [markdown]
-# Changing the diagonal from histograms to KDE:
+# Changing the diagonal from histograms to KDE reuses the same summary:
 
 # %%
-scatter_matrix(fb, figsize=(10, 10), diagonal="kde")
+fb_pairs.plot(figsize=(10, 10), diagonal="kde", kind="scatter")
 
 # %% [markdown]
 # ## Lag plot
@@ -46,17 +51,19 @@ lag_plot(pd.Series(np.random.random(size=200)))
 lag_plot(fb.close)
 
 # %% [markdown]
-# The default lag is 1, but we can alter this with the `lag` parameter. Let's look at a 5 day lag (a week of trading activity):
+# The default lag is 1, but we can alter this with the `lag` parameter. To compare several lags at once, `lag_grid()` (from `src/`) makes one lag plot per lag from the same array (every lag's pairs are just shifted views of it). Let's look at a 1 day lag and a 5 day lag (a week of trading activity):
 
 # %%
-lag_plot(fb.close, lag=5)
+from autocorrelation import lag_grid
+
+lag_grid(fb.close, lags=[1, 5])
 
 # %% [markdown]
 # ## Autocorrelation plots
-# We can use the autocorrelation plot to see if this relationship may be meaningful or is just noise. Random data will not have any significant autocorrelation (it stays within the bounds below):
+# We can use the autocorrelation plot to see if this relationship may be meaningful or is just noise. Random data will not have any significant autocorrelation (it stays within the bounds below). The `autocorrelation_plot()` function in `src/` computes the autocorrelation at every lag at once with the FFT, so it also works on very long series:
 
 # %%
-from pandas.plotting import autocorrelation_plot
+from autocorrelation import autocorrelation_plot
 
 np.random.seed(0)  # make this repeatable
 autocorrelation_plot(pd.Series(np.random.random(size=200)))
@@ -67,11 +74,24 @@ autocorrelation_plot(pd.Series(np.random.random(size=200)))
 # %%
 autocorrelation_plot(fb.close)
 
+# %% [markdown]
+# Much of this comes from each day's price being close to the previous day's. The partial autocorrelation removes the effect of the lags in between, leaving only a significant first lag:
+
+# %%
+autocorrelation_plot(fb.close, nlags=40, partial=True)
+
 # %% [markdown]
 # ## Bootstrap plot
-# This plot helps us understand the uncertainty in our summary statistics:
+# This plot helps us understand the uncertainty in our summary statistics. The `bootstrap()` function (from `src/`) draws all the resamples at once as an array of indices and computes each statistic for every resample in one call:
 
 # %%
-from pandas.plotting import bootstrap_plot
+from bootstrap import bootstrap
+
+fb_volume_bootstrap = bootstrap(fb.volume, n_resamples=500, seed=0)
+fig = fb_volume_bootstrap.plot(fig=plt.figure(figsize=(10, 6)))
 
-fig = bootstrap_plot(fb.volume, fig=plt.figure(figsize=(10, 6)))
+# %% [markdown]
+# Along with the plots, we get confidence intervals for each statistic (the dashed lines above):
+
+# %%
+fb_volume_bootstrap.confidence_interval(level=0.95)
@@ -33,19 +33,26 @@
 # ## Setup
 
 # %%
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+sys.path.append("../src/")
+from compaction import compact
+from covid import CovidAggregates, load_covid
+
 fb = pd.read_csv("../data/fb_stock_prices_2018.csv", index_col="date", parse_dates=True)
-quakes = pd.read_csv("../data/earthquakes.csv")
-covid = (
-    pd.read_csv("../data/covid19_cases.csv")
-    .assign(date=lambda x: pd.to_datetime(x.dateRep, format="%d/%m/%Y"))
-    .set_index("date")
-    .replace("United_States_of_America", "USA")
-    .sort_index()["2020-01-18":"2020-09-18"]
-)
+# `compact()` stores repeated strings as categories and uses smaller number types
+quakes = pd.read_csv("../data/earthquakes.csv").pipe(compact)
+# `load_covid()` only reads the columns and dates we plot and renames the USA
+covid = load_covid(
+    "../data/covid19_cases.csv",
+    columns=["cases", "countriesAndTerritories"],
+    start="2020-01-18",
+    end="2020-09-18",
+).pipe(compact)
 
 # %% [markdown]
 # ## Evolution over time
@@ -103,14 +110,12 @@ fb.plot(
 #
 # Sometimes we want to make subplots that each have a few variables in them for comparison. This can be achieved using the `ax` parameter. To illustrate this, let's take a look at daily new COVID-19 cases in China, Spain, Italy, the USA, Brazil, and India:
 
+# %% [markdown]
+# We could pivot the data with `pivot_table()` and call `rolling(7).mean()` on the result; instead, `CovidAggregates` computes daily values, 7-day rolling averages and cumulative sums for every country at once, so each of the plots below only looks up the countries it needs:
+
 # %%
-new_cases_rolling_average = (
-    covid.pivot_table(
-        index=covid.index, columns="countriesAndTerritories", values="cases"
-    )
-    .rolling(7)
-    .mean()
-)
+covid_aggregates = CovidAggregates.from_frame(covid, measures=["cases"])
+new_cases_rolling_average = covid_aggregates.frame("cases", kind="rolling")
 
 # %% [markdown]
 # Since there is a lot of fluctuation in these values, we will plot the 7-day moving average of new cases using the `rolling()` method (discussed in chapter 4). Rather than create a separate plot for each country (which makes it harder to compare) or plot them all together (which will make it difficult to see the smaller values), we will plot countries that have had a similar number of cases in the same subplot:
@@ -155,11 +160,10 @@ new_cases_rolling_average.sort_index(axis=1).assign(
 # %%
 fig, axes = plt.subplots(1, 3, figsize=(15, 3))
 
-cumulative_covid_cases = (
-    covid.groupby(["countriesAndTerritories", pd.Grouper(freq="1D")])
-    .cases.sum()
-    .unstack(0)
-    .apply("cumsum")
+cumulative_covid_cases = covid_aggregates.frame(
+    "cases",
+    kind="cumulative",
+    countries=["China", "Italy", "Spain", "Brazil", "India", "USA"],
 )
 
 cumulative_covid_cases[["China"]].plot(ax=axes[0], style="-.c")
@@ -178,7 +182,8 @@ cumulative_covid_cases[["Brazil", "India", "USA"]].plot(
 # We make scatter plots to help visualize the relationship between two variables. Creating scatter plots requires we pass in `kind='scatter'` along with a column for the x-axis and a column for the y-axis:
 
 # %%
-fb.assign(max_abs_change=fb.high - fb.low).plot(
+fb_ranges = fb.assign(log_volume=np.log(fb.volume), max_abs_change=fb.high - fb.low)
+fb_ranges.plot(
     kind="scatter",
     x="volume",
     y="max_abs_change",
@@ -189,7 +194,7 @@ fb.assign(max_abs_change=fb.high - fb.low).plot(
 # The relationship doesn't seem to be linear, but we can try a log transform on the x-axis since the scales of the axes are very different. With `pandas`, we simply pass in `logx=True`:
 
 # %%
-fb.assign(max_abs_change=fb.high - fb.low).plot(
+fb_ranges.plot(
     kind="scatter",
     x="volume",
     y="max_abs_change",
@@ -204,7 +209,7 @@ fb.assign(max_abs_change=fb.high - fb.low).plot(
 # Sometimes our plots have many overlapping values, but this can be impossible to see. This can be addressed by increasing the transparency of what we are plotting using the `alpha` parameter. It is a float in the range [0, 1] where 0 is completely transparent and 1 is completely opaque. By default this is 1, so let's put in a lower value and re-plot the scatter plot:
 
 # %%
-fb.assign(max_abs_change=fb.high - fb.low).plot(
+fb_ranges.plot(
     kind="scatter",
     x="volume",
     y="max_abs_change",
@@ -218,7 +223,7 @@ fb.assign(max_abs_change=fb.high - fb.low).plot(
 # In the previous example, we can start to see the overlaps, but it is still difficult. Hexbins are another plot type that divide up the plot into hexagons, which are shaded according to the density of points there. With `pandas`, this is the `hexbin` value for the `kind` argument. It may also be necessary to tweak the `gridsize`, which determines the number of hexagons along the y-axis:
 
 # %%
-fb.assign(log_volume=np.log(fb.volume), max_abs_change=fb.high - fb.low).plot(
+fb_ranges.plot(
     kind="hexbin",
     x="log_volume",
     y="max_abs_change",
@@ -228,41 +233,41 @@ fb.assign(log_volume=np.log(fb.volume), max_abs_change=fb.high - fb.low).plot(
     sharex=False,  # we have to pass this to see the x-axis
 )
 
+# %% [markdown]
+# Both of these plots go through every point each time they are drawn. For much larger datasets, we can bin the points once with `DensityPyramid` (from `src/`), which keeps the counts at several resolutions; changing the `gridsize` or zooming in with `xlim`/`ylim` then only reads the counts for the visible cells:
+
+# %%
+from density import DensityPyramid
+
+fb_density = DensityPyramid.from_values(fb_ranges.volume, fb_ranges.max_abs_change, log_x=True)
+
+fig, axes = plt.subplots(1, 2, figsize=(15, 5))
+fb_density.plot(kind="hexbin", gridsize=20, ax=axes[0])
+axes[0].set_title("Facebook Daily High - Low vs. log(Volume Traded)")
+fb_density.plot(kind="heatmap", gridsize=64, xlim=(1e7, 5e7), ylim=(0, 10), ax=axes[1])
+axes[1].set_title("Zoomed In")
+
 # %% [markdown]
 # ### Visualizing Correlations with Heatmaps
-# Pandas doesn't offer heatmaps; however, if we are able to get our data into a matrix, we can use `matshow()` from matplotlib:
+# Pandas doesn't offer heatmaps; however, if we are able to get our data into a matrix, we can use `matshow()` from matplotlib. The `correlation_heatmap()` function (from `src/`) does this and labels each box with its correlation coefficient:
 
 # %%
+from correlation import correlation_heatmap, streaming_corr
+
 fig, ax = plt.subplots(figsize=(20, 10))
 
 # calculate the correlation matrix
-fb_corr = fb.assign(
-    log_volume=np.log(fb.volume), max_abs_change=fb.high - fb.low
-).corr()
-
-# create the heatmap and colorbar
-im = ax.matshow(fb_corr, cmap="seismic")
-im.set_clim(-1, 1)
-fig.colorbar(im)
-
-# label the ticks with the column names
-labels = [col.lower() for col in fb_corr.columns]
-ax.set_xticks(ax.get_xticks()[1:-1])  # to handle bug in matplotlib
-ax.set_xticklabels(labels, rotation=45)
-ax.set_yticks(ax.get_yticks()[1:-1])  # to handle bug in matplotlib
-ax.set_yticklabels(labels)
-
-# include the value of the correlation coefficient in the boxes
-for (i, j), coef in np.ndenumerate(fb_corr):
-    ax.text(
-        i,
-        j,
-        rf"$\rho$ = {coef:.2f}",  # raw (r), format (f) string
-        ha="center",
-        va="center",
-        color="white",
-        fontsize=14,
-    )
+fb_corr = fb_ranges.corr()
+
+# create the heatmap with the value of the correlation coefficient in the boxes
+correlation_heatmap(fb_corr, ax=ax)
+
+# %% [markdown]
+# When the data is too large to load at once, `streaming_corr()` builds the same matrix from chunks of rows (for example, `pd.read_csv(..., chunksize=100_000)`), keeping only running sums between chunks:
+
+# %%
+fb_chunks = (fb_ranges.iloc[i : i + 50] for i in range(0, len(fb_ranges), 50))
+np.allclose(streaming_corr(fb_chunks), fb_corr)
 
 # %% [markdown]
 # Accessing the values in the correlation matrix can be done with `loc[]`:
@@ -282,20 +287,16 @@ plt.xlabel("Volume traded")  # label the x-axis (discussed in chapter 6)
 # %% [markdown]
 # We can overlap histograms to compare distributions provided we use the `alpha` parameter. For example, let's compare the usage and magnitude of the various measurement techniques (the `magType` column) in the data:
 
+# %% [markdown]
+# Rather than filtering the data once per `magType`, `grouped_histogram()` (from `src/`) counts the magnitudes of every `magType` on the same bins in a single pass:
+
 # %%
+from grouped_stats import grouped_histogram
+
 fig, axes = plt.subplots(figsize=(8, 5))
 
-for magtype in quakes.magType.unique():
-    data = quakes.query(f'magType == "{magtype}"').mag
-    if not data.empty:
-        data.plot(
-            kind="hist",
-            ax=axes,
-            alpha=0.4,
-            label=magtype,
-            legend=True,
-            title="Comparing histograms of earthquake magnitude by magType",
-        )
+grouped_histogram(quakes.mag, quakes.magType).plot(ax=axes)
+axes.set_title("Comparing histograms of earthquake magnitude by magType")
 
 plt.xlabel("magnitude")  # label the x-axis (discussed in chapter 6)
 
@@ -380,19 +381,24 @@ fb.iloc[:, :4].plot(kind="box", title="Facebook OHLC Prices Box Plot", notch=Tru
 plt.ylabel("price ($)")  # label the y-axis (discussed in chapter 6)
 
 # %% [markdown]
-# This can also be combined with a call to `groupby()`:
+# This can also be combined with a call to `groupby()`. With many groups or rows, the `box_stats()` function (from `src/`) computes the quartiles, whiskers, and outliers for every group and column up front, which `grouped_boxplot()` then draws with `Axes.bxp()`:
 
 # %%
-fb.assign(volume_bin=pd.cut(fb.volume, 3, labels=["low", "med", "high"])).groupby(
-    "volume_bin"
-).boxplot(column=["open", "high", "low", "close"], layout=(1, 3), figsize=(12, 3))
+from grouped_stats import box_stats, grouped_boxplot
+
+fb_volume_box_stats = box_stats(
+    fb.assign(volume_bin=pd.cut(fb.volume, 3, labels=["low", "med", "high"])),
+    ["open", "high", "low", "close"],
+    by="volume_bin",
+)
+grouped_boxplot(fb_volume_box_stats, layout=(1, 3), figsize=(12, 3))
 plt.suptitle("Facebook OHLC Box Plots by Volume Traded", y=1.1)
 
 # %% [markdown]
 # We can use this to see the distribution of magnitudes across the different measurement methods for earthquakes:
 
 # %%
-quakes[["mag", "magType"]].groupby("magType").boxplot(figsize=(15, 8), subplots=False)
+grouped_boxplot(box_stats(quakes, "mag", by="magType"), subplots=False, figsize=(15, 8))
 plt.title("Earthquake Magnitude Box Plots by magType")
 plt.ylabel("magnitude")  # label the y-axis (discussed in chapter 6)
 
@@ -413,7 +419,7 @@ plt.xlabel("earthquakes")  # label the x-axis (discussed in chapter 6)
 # We also have data on whether earthquakes were accompanied by tsunamis. Let's see what the top places for tsunamis are:
 
 # %%
-quakes.groupby("parsed_place").tsunami.sum().sort_values().iloc[-10:,].plot(
+quakes.groupby("parsed_place", observed=True).tsunami.sum().sort_values().iloc[-10:,].plot(
     kind="barh",
     figsize=(10, 5),
     title="Top 10 Places for Tsunamis " "(September 18, 2018 - October 13, 2018)",
@@ -421,16 +427,15 @@ quakes.groupby("parsed_place").tsunami.sum().sort_values().iloc[-10:,].plot(
 plt.xlabel("tsunamis")  # label the x-axis (discussed in chapter 6)
 
 # %% [markdown]
-# Seeing that Indonesia is the top place for tsunamis during the time period we are looking at, we may want to look how many earthquakes and tsunamis Indonesia gets on a daily basis. We could show this as a line plot or with bars; since we don't want to interpolate, we will use bars here:
+# Seeing that Indonesia is the top place for tsunamis during the time period we are looking at, we may want to look how many earthquakes and tsunamis Indonesia gets on a daily basis. We could show this as a line plot or with bars; since we don't want to interpolate, we will use bars here.
+#
+# Rather than filtering and resampling the data for each place we want to look at, we can use `DailyEventCounts` (from `src/`) to count the earthquakes and tsunamis for every place and day at once; each place's daily counts are then a lookup:
 
 # %%
-indonesia_quakes = (
-    quakes.query('parsed_place == "Indonesia"')
-    .assign(time=lambda x: pd.to_datetime(x.time, unit="ms"), earthquake=1)
-    .set_index("time")
-    .resample("1D")
-    .sum()
-)
+from grouped_stats import DailyEventCounts
+
+daily_quake_counts = DailyEventCounts.from_frame(quakes, sums=["tsunami"])
+indonesia_quakes = daily_quake_counts.frame("Indonesia")
 
 # format the datetimes in the index for the x-axis
 indonesia_quakes.index = indonesia_quakes.index.strftime("%b\n%d")
@@ -452,12 +457,20 @@ plt.ylabel("count")
 # %% [markdown]
 # ### Grouped Bars
 
+# %% [markdown]
+# To get the frequency of tsunamis for each place, we count the earthquakes for each combination of `parsed_place` and `tsunami` with `contingency_table()` (from `src/`), which can then give us the counts as fractions of each place's total:
+
 # %%
-quakes.groupby(["parsed_place", "tsunami"]).mag.count().unstack().apply(
-    lambda x: x / x.sum(), axis=1
-).rename(columns={0: "no", 1: "yes"}).sort_values("yes", ascending=False)[
-    7::-1
-].plot.barh(title="Frequency of a tsunami accompanying an earthquake")
+from grouped_stats import contingency_table
+
+tsunami_by_place = contingency_table(quakes, "parsed_place", "tsunami", values="mag")
+tsunami_frequency = (
+    tsunami_by_place.frame(normalize="index")
+    .rename(columns={0: "no", 1: "yes"})
+    .sort_values("yes", ascending=False)
+)
+
+tsunami_frequency[7::-1].plot.barh(title="Frequency of a tsunami accompanying an earthquake")
 
 # move legend to the right of the plot
 plt.legend(title="tsunami?", bbox_to_anchor=(1, 0.65))
@@ -481,10 +494,14 @@ plt.ylabel("earthquakes")
 # %% [markdown]
 # ### Stacked bars
 
+# %% [markdown]
+# We need the number of earthquakes for each integer magnitude and `magType`. The `BinnedPivot` class (from `src/`) counts these in one pass, giving the same table as `pivot_table()` with `aggfunc="count"` (but with 0 instead of `NaN` for combinations without any earthquakes). It can also count new earthquakes with its `update()` method, so we wouldn't have to start over for new data:
+
 # %%
-pivot = quakes.assign(mag_bin=lambda x: np.floor(x.mag)).pivot_table(
-    index="mag_bin", columns="magType", values="mag", aggfunc="count"
-)
+from grouped_stats import BinnedPivot
+
+mag_type_counts = BinnedPivot.from_frame(quakes, value="mag", columns="magType")
+pivot = mag_type_counts.frame()
 pivot.plot.bar(
     stacked=True,
     rot=0,
@@ -497,7 +514,7 @@ pivot.plot.bar(
 # Plot the percentages to be better able to see the different `magTypes`.
 
 # %%
-normalized_pivot = pivot.fillna(0).apply(lambda x: x / x.sum(), axis=1)
+normalized_pivot = mag_type_counts.frame(normalize="index")
 ax = normalized_pivot.plot.bar(
     stacked=True,
     rot=0,
@@ -508,14 +525,12 @@ ax.legend(bbox_to_anchor=(1, 0.8))  # move legend to the right of the plot
 plt.ylabel("percentage")  # label the y-axis (discussed in chapter 6)
 
 # %% [markdown]
-# We can also create horizontal stacked bars and do so using `groupby()` and `unstack()`:
+# We can also create horizontal stacked bars; since the counts are already in `tsunami_by_place`, we just reuse the normalized table:
 
 # %%
-quakes.groupby(["parsed_place", "tsunami"]).mag.count().unstack().apply(
-    lambda x: x / x.sum(), axis=1
-).rename(columns={0: "no", 1: "yes"}).sort_values("yes", ascending=False)[
-    7::-1
-].plot.barh(title="Frequency of a tsunami accompanying an earthquake", stacked=True)
+tsunami_frequency[7::-1].plot.barh(
+    title="Frequency of a tsunami accompanying an earthquake", stacked=True
+)
 
 # move legend to the right of the plot
 plt.legend(title="tsunami?", bbox_to_anchor=(1, 0.65))
@@ -523,3 +538,9 @@ plt.legend(title="tsunami?", bbox_to_anchor=(1, 0.65))
 # label the axes (discussed in chapter 6)
 plt.xlabel("percentage of earthquakes")
 plt.ylabel("")
+
+# %% [markdown]
+# The same counts also tell us whether tsunamis are independent of the place with a chi-square test (the statistic, degrees of freedom, and p-value):
+
+# %%
+tsunami_by_place.chi2()
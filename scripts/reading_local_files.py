@@ -22,13 +22,19 @@
 # Step 1: Import ```pandas``` into your python program.
 
 # %%
+import sys
+
 import pandas as pd
 
 # This will import the pandas and numpy packages into your Python program.
 
+sys.path.append("../src/")
+import readers
+
 df_json = pd.read_json("../data/food-waste-pilot/food-waste-pilot.json")
 df_csv = pd.read_csv("../data/food-waste-pilot/food-waste-pilot.csv")
-df_xlsx = pd.read_excel("../data/food-waste-pilot/food-waste-pilot.xlsx")
+# Excel parsing is slow, so `readers.read_excel()` caches the parsed sheet until the workbook changes.
+df_xlsx = readers.read_excel("../data/food-waste-pilot/food-waste-pilot.xlsx")
 
 # %%
 df_csv.shape
@@ -108,3 +114,12 @@ df_csv_parsed_dates = pd.read_csv(
 
 # %%
 df_csv_parsed_dates.plot()
+
+# %% [markdown]
+# ## Reading a dataset once, whatever format it comes in
+#
+# The food waste pilot data above exists as JSON, CSV and Excel files. `readers.read_dataset()` picks the cheapest of those formats to parse, reads it once, and converts ISO-formatted date columns while reading, so we don't need to convert `Collection Date` afterwards:
+
+# %%
+df_food_waste = readers.read_dataset("../data/food-waste-pilot/food-waste-pilot")
+df_food_waste.dtypes
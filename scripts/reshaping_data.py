@@ -67,12 +67,24 @@ pivoted_df.describe()
 
 # %% [markdown]
 # We can also provide multiple values to pivot on, which will result in a
-# hierarchical index:
+# hierarchical index. Each call to `pivot()` works out again where every row
+# goes in the wide format. When we pivot the same data more than once, a
+# `PivotLayout` (from `src/`) does this once, and each pivot just places the
+# values:
 
 # %%
-pivoted_df = long_df.pivot(
-    index="date", columns="datatype", values=["temp_C", "temp_F"]
+import sys
+
+sys.path.append("../src/")
+from reshaping import PivotLayout
+
+layout = PivotLayout.from_frame(long_df, index="date", columns="datatype")
+layout.pivot(long_df, "temp_C").equals(
+    long_df.pivot(index="date", columns="datatype", values="temp_C")
 )
+
+# %%
+pivoted_df = layout.pivot(long_df, ["temp_C", "temp_F"])
 pivoted_df.head()
 
 # %% [markdown]
@@ -115,14 +127,17 @@ unstacked_df.head()
 # data. Consider the case that we have data for the average temperature on
 # October 1, 2018, but no other date:
 
+# %% [markdown]
+# `DataFrame.append()` copied the whole dataframe for every row added and has been
+# removed in `pandas` 2, so we collect new rows in an `AppendBuffer` (from `src/`)
+# and only build a dataframe from it once we are done adding rows:
+
 # %%
-extra_data = (
-    long_df.append(
-        [{"datatype": "TAVG", "date": "2018-10-01", "temp_C": 10, "temp_F": 50}]
-    )
-    .set_index(["date", "datatype"])
-    .sort_index()
-)
+from append_buffer import AppendBuffer
+
+buffer = AppendBuffer.from_frame(long_df)
+buffer.append({"datatype": "TAVG", "date": "2018-10-01", "temp_C": 10, "temp_F": 50})
+extra_data = buffer.to_frame().set_index(["date", "datatype"]).sort_index()
 
 extra_data["2018-10-01":"2018-10-02"]
 
@@ -0,0 +1,132 @@
+"""Columnar buffer for appending rows to a dataframe without copying its history on every insert."""
+
+import numpy as np
+import pandas as pd
+
+class AppendBuffer:
+    """
+    Growable column arrays with amortized O(1) row and batch appends.
+
+    Capacity doubles whenever it runs out, so streaming `n` rows costs O(n) copies in
+    total instead of the O(n^2) of repeatedly concatenating onto a dataframe.
+    """
+
+    def __init__(self, dtypes, capacity=1024):
+        self.columns = list(dtypes)
+        self.dtypes = dict(dtypes)
+        self._arrays = {
+            column: np.empty(capacity, dtype=self._numpy_dtype(dtype)) for column, dtype in dtypes.items()
+        }
+        self._size = 0
+
+    @staticmethod
+    def _numpy_dtype(dtype):
+        """Map a pandas dtype to one numpy can hold (extension types become object until `to_frame()`)."""
+        return dtype if isinstance(dtype, np.dtype) else np.dtype(object)
+
+    def _allow_missing(self, column):
+        """
+        Make sure a column can hold missing values, like `pd.concat()` does: integers become
+        floats and booleans become objects (a one-time copy of that column).
+        """
+        array = self._arrays[column]
+        if array.dtype.kind in 'iu':
+            self._arrays[column] = array.astype('float64')
+        elif array.dtype.kind == 'b':
+            self._arrays[column] = array.astype(object)
+
+    def _widen(self, column, values):
+        """
+        Make sure an integer or boolean column can hold `values` exactly, like `pd.concat()` does:
+        floats make integer columns floats, and anything else that isn't the same kind makes them objects.
+        """
+        array = self._arrays[column]
+        kind = np.asarray(values).dtype.kind
+        if array.dtype.kind not in 'iub' or kind == array.dtype.kind or kind + array.dtype.kind in ('iu', 'ui'):
+            return
+        self._arrays[column] = array.astype('float64' if kind == 'f' and array.dtype.kind in 'iu' else object)
+
+    def _missing(self, column):
+        """The missing value for a column: `NaT` for dates and durations, NaN otherwise."""
+        self._allow_missing(column)
+        dtype = self._arrays[column].dtype
+        return np.array('NaT', dtype=dtype) if dtype.kind in 'mM' else np.nan
+
+    @classmethod
+    def from_frame(cls, df, capacity=None):
+        """Create a buffer with the columns and dtypes of `df`, holding a copy of its rows."""
+        buffer = cls(df.dtypes.to_dict(), capacity=max(capacity or 0, 2 * len(df), 1))
+        buffer.extend(df)
+        return buffer
+
+    @property
+    def capacity(self):
+        return len(self._arrays[self.columns[0]]) if self.columns else 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, n_rows):
+        """Make room for `n_rows` more rows, doubling the capacity as needed."""
+        needed = self._size + n_rows
+        if needed <= self.capacity:
+            return
+
+        new_capacity = max(self.capacity, 1)
+        while new_capacity < needed:
+            new_capacity *= 2
+        for column, array in self._arrays.items():
+            grown = np.empty(new_capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._arrays[column] = grown
+
+    def append(self, row):
+        """Append a single row given as a mapping of column name to value; missing columns get missing values."""
+        self._reserve(1)
+        for column in self.columns:
+            value = row[column] if column in row else None
+            if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+                value = self._missing(column)
+            else:
+                self._widen(column, value)
+            self._arrays[column][self._size] = value
+        self._size += 1
+
+    def extend(self, rows):
+        """Append a batch of rows given as a dataframe or a list of row mappings."""
+        if not isinstance(rows, pd.DataFrame):
+            rows = pd.DataFrame.from_records(list(rows), columns=self.columns)
+        n_rows = len(rows)
+        self._reserve(n_rows)
+
+        for column in self.columns:
+            if column not in rows:
+                values = self._missing(column)
+            else:
+                values = rows[column].to_numpy()
+                if self._arrays[column].dtype.kind in 'iub' and pd.isna(values).any():
+                    self._allow_missing(column)
+                self._widen(column, values)
+            self._arrays[column][self._size:self._size + n_rows] = values
+        self._size += n_rows
+
+    def to_frame(self):
+        """
+        Compact the buffered rows into a dataframe, restoring extension dtypes (like `category`).
+        Values appended to a categorical column that aren't among its categories are added as new ones.
+
+        Other columns are views of the filled part of the buffer; rows already written are
+        never modified, so later appends don't change the returned dataframe.
+        """
+        df = pd.DataFrame(
+            {column: array[:self._size] for column, array in self._arrays.items()}, columns=self.columns, copy=False
+        )
+        extension_dtypes = {
+            column: dtype for column, dtype in self.dtypes.items() if not isinstance(dtype, np.dtype)
+        }
+        for column, dtype in extension_dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                seen = pd.Index(df[column].dropna().unique())
+                categories = dtype.categories.append(seen.difference(dtype.categories, sort=False))
+                extension_dtypes[column] = pd.CategoricalDtype(categories, ordered=dtype.ordered)
+        return df.astype(extension_dtypes) if extension_dtypes else df
@@ -0,0 +1,98 @@
+"""Functions for computing and plotting the autocorrelation of long series."""
+
+from statistics import NormalDist
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+def acf(x, nlags=None):
+    """
+    Autocorrelation of `x` at lags 0 through `nlags` (default: all lags), computed with the FFT.
+
+    Uses the same estimator as `pandas.plotting.autocorrelation_plot()` (autocovariances
+    divided by the length of the series), in O(n log n) instead of one pass per lag.
+    """
+    x = np.asarray(x, dtype='float64')
+    n = len(x)
+    nlags = n - 1 if nlags is None else min(nlags, n - 1)
+
+    # zero-pad to avoid circular wrap-around; a power of 2 keeps the FFT fast
+    size = 1 << int(np.ceil(np.log2(2 * n - 1)))
+    spectrum = np.fft.rfft(x - x.mean(), n=size)
+    autocovariance = np.fft.irfft(spectrum * np.conj(spectrum), n=size)[:nlags + 1] / n
+    return autocovariance / autocovariance[0]
+
+def pacf(x, nlags=40):
+    """Partial autocorrelation of `x` at lags 0 through `nlags`, from the ACF with the Durbin-Levinson recursion."""
+    r = acf(x, nlags)
+    nlags = len(r) - 1
+    result = np.ones(nlags + 1)
+    phi = np.zeros(0)
+    for k in range(1, nlags + 1):
+        # coefficients of the order-k autoregression from those of order k - 1
+        denominator = 1 - phi @ r[1:k]
+        phi_kk = (r[k] - phi @ r[k - 1:0:-1]) / denominator if denominator else np.nan
+        phi = np.append(phi - phi_kk * phi[::-1], phi_kk)
+        result[k] = phi_kk
+    return result
+
+def confidence_bands(n, levels=(0.95, 0.99)):
+    """Half-widths of the bands outside of which autocorrelations are significant at each confidence level."""
+    return {level: NormalDist().inv_cdf((1 + level) / 2) / np.sqrt(n) for level in levels}
+
+def autocorrelation_plot(series, nlags=None, partial=False, ax=None, **kwargs):
+    """
+    Plot the (partial, with `partial=True`) autocorrelation of `series` with its confidence bands,
+    like `pandas.plotting.autocorrelation_plot()`.
+
+    By default, the autocorrelation is shown for every lag, but the partial autocorrelation
+    only for the first `min(n // 2, 40)` lags, since its recursion is quadratic in the lags.
+    """
+    ax = ax or plt.gca()
+    n = len(series)
+    if partial:
+        values = pacf(series, min(n // 2, 40) if nlags is None else nlags)
+    else:
+        values = acf(series, nlags)
+    lags = np.arange(1, len(values))
+
+    for (level, width), style in zip(confidence_bands(n).items(), ('-', '--')):
+        ax.axhline(y=width, linestyle=style, color='grey', label=f'{level:.0%} confidence band')
+        ax.axhline(y=-width, linestyle=style, color='grey')
+    ax.axhline(y=0.0, color='black')
+    ax.plot(lags, values[1:], **kwargs)
+    ax.set_xlim(1, max(lags[-1], 2) if len(lags) else 2)
+    ax.set_xlabel('Lag')
+    ax.set_ylabel('Partial autocorrelation' if partial else 'Autocorrelation')
+    return ax
+
+def lag_pairs(series, lag):
+    """Return `(y(t), y(t + lag))` as two views of the same array (no copies)."""
+    values = np.asarray(series, dtype='float64')
+    return values[:-lag], values[lag:]
+
+def lag_grid(series, lags=(1, 5), max_points=10_000, ncols=3, figsize=None, **kwargs):
+    """
+    Make a lag plot of `series` for each of `lags` in a grid of subplots.
+
+    Every lag's pairs are views of one array; series longer than `max_points` are thinned to
+    every k-th pair so the plots stay readable and fast.
+    """
+    values = np.asarray(series, dtype='float64')
+    ncols = min(ncols, len(lags))
+    nrows = int(np.ceil(len(lags) / ncols))
+    fig, axes = plt.subplots(nrows, ncols, figsize=figsize or (4 * ncols, 4 * nrows), squeeze=False)
+
+    for ax, lag in zip(axes.flatten(), lags):
+        current, shifted = lag_pairs(values, lag)
+        step = max(len(current) // max_points, 1)
+        ax.scatter(current[::step], shifted[::step], **kwargs)
+        ax.set_xlabel('y(t)')
+        ax.set_ylabel(f'y(t + {lag})')
+        ax.set_title(f'lag = {lag}')
+
+    # hide unused subplots
+    for ax in axes.flatten()[len(lags):]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    return axes
@@ -0,0 +1,118 @@
+"""Functions for bootstrapping summary statistics with vectorized resampling."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+def _midrange(samples, axis):
+    return (samples.max(axis=axis) + samples.min(axis=axis)) / 2
+
+STATISTICS = {
+    'mean': np.mean,
+    'median': np.median,
+    'midrange': _midrange,
+    'std': np.std,
+}
+
+def _resample(values, statistics, n_resamples, size, seed, max_elements):
+    """
+    Compute each statistic on `n_resamples` resamples of `size` values drawn with replacement.
+
+    The indices of a batch of resamples are drawn as one 2D array (a row per resample);
+    batches hold at most `max_elements` values so memory stays bounded for large inputs.
+    """
+    rng = np.random.default_rng(seed)
+    batch_size = max(max_elements // size, 1)
+    results = {name: np.empty(n_resamples) for name in statistics}
+    for start in range(0, n_resamples, batch_size):
+        stop = min(start + batch_size, n_resamples)
+        samples = values[rng.integers(0, len(values), size=(stop - start, size))]
+        for name, statistic in statistics.items():
+            results[name][start:stop] = statistic(samples, axis=1)
+    return results
+
+class BootstrapResult:
+    """The value of each statistic on every resample, with percentile confidence intervals."""
+
+    def __init__(self, estimates, observed):
+        self.estimates = estimates
+        self.observed = observed
+
+    def frame(self):
+        """Return the estimates as a dataframe with a row per resample and a column per statistic."""
+        return pd.DataFrame(self.estimates)
+
+    def confidence_interval(self, level=0.95):
+        """Percentile confidence intervals of each statistic as a dataframe with `lower` and `upper` columns."""
+        alpha = (1 - level) / 2
+        return pd.DataFrame({
+            name: {
+                'observed': self.observed[name],
+                'lower': np.quantile(values, alpha),
+                'upper': np.quantile(values, 1 - alpha),
+            }
+            for name, values in self.estimates.items()
+        }).T
+
+    def plot(self, level=0.95, fig=None, **kwargs):
+        """
+        Plot each statistic across the resamples (top row) and its distribution with the
+        confidence interval (bottom row), like `pandas.plotting.bootstrap_plot()`.
+        """
+        fig = fig or plt.figure(figsize=(4 * len(self.estimates), 6))
+        intervals = self.confidence_interval(level)
+        axes = fig.subplots(2, len(self.estimates), squeeze=False)
+        for (top, bottom), (name, values) in zip(axes.T, self.estimates.items()):
+            top.plot(values, **kwargs)
+            top.set_xlabel('Sample')
+            top.set_title(name.capitalize())
+            bottom.hist(values, **kwargs)
+            for bound in intervals.loc[name, ['lower', 'upper']]:
+                bottom.axvline(bound, color='black', linestyle='--')
+            bottom.set_xlabel(name.capitalize())
+        fig.tight_layout()
+        return fig
+
+def bootstrap(values, statistics=('mean', 'median', 'midrange'), n_resamples=500, size=None, seed=None,
+              processes=None, max_elements=10_000_000):
+    """
+    Bootstrap `statistics` of `values` (missing values are dropped).
+
+    Parameters:
+        - values: The data to resample.
+        - statistics: Names from `STATISTICS` or a dictionary of name -> function taking
+          `(samples, axis)` like the NumPy reductions do.
+        - n_resamples: The number of resamples.
+        - size: The size of each resample, which defaults to the number of values.
+          Unlike `pandas.plotting.bootstrap_plot()`, values are drawn with replacement.
+        - seed: Seed for `np.random.default_rng()` to make the results repeatable.
+        - processes: Split the resamples across this many worker processes (each with
+          an independent random stream); by default, everything runs in this process.
+        - max_elements: The most values to hold in one batch of resamples.
+
+    Returns:
+        A `BootstrapResult` object.
+    """
+    values = pd.Series(values).dropna().to_numpy()
+    size = size or len(values)
+    if not isinstance(statistics, dict):
+        statistics = {name: STATISTICS[name] for name in statistics}
+
+    if processes and processes > 1:
+        seeds = np.random.SeedSequence(seed).spawn(processes)
+        shards = np.array_split(np.arange(n_resamples), processes)
+        with ProcessPoolExecutor(processes) as executor:
+            parts = list(executor.map(
+                _resample, *zip(*[
+                    (values, statistics, len(shard), size, shard_seed, max_elements)
+                    for shard, shard_seed in zip(shards, seeds)
+                ])
+            ))
+        estimates = {name: np.concatenate([part[name] for part in parts]) for name in statistics}
+    else:
+        estimates = _resample(values, statistics, n_resamples, size, seed, max_elements)
+
+    observed = {name: statistic(values[np.newaxis], axis=1)[0] for name, statistic in statistics.items()}
+    return BootstrapResult(estimates, observed)
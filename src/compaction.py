@@ -0,0 +1,44 @@
+"""Functions for shrinking the in-memory representation of dataframes."""
+
+import pandas as pd
+
+def _is_string(values):
+    """Whether a column holds strings, ignoring missing values (which make `is_string_dtype()` False for object columns)."""
+    return pd.api.types.is_string_dtype(values) or (
+        values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == 'string'
+    )
+
+def compact(df, max_unique_ratio=0.5, downcast_floats=True, exclude=()):
+    """
+    Return a copy of `df` using less memory.
+
+    - string columns with few distinct values (at most `max_unique_ratio` of the rows) become
+      categoricals, so grouping and filtering on them compares integer codes instead of strings
+    - integer columns are downcast to the smallest type holding their values (e.g. `int8` for `tsunami`)
+    - float columns become `float32` when `downcast_floats` is True (e.g. `mag`)
+
+    Columns listed in `exclude` are left untouched.
+    """
+    columns = {}
+    for column in df.columns.difference(exclude, sort=False):
+        values = df[column]
+        if pd.api.types.is_bool_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_integer_dtype(values):
+            columns[column] = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_float_dtype(values) and downcast_floats:
+            columns[column] = pd.to_numeric(values, downcast='float')
+        elif _is_string(values) and values.nunique() <= max_unique_ratio * len(values):
+            columns[column] = values.astype('category')
+    return df.assign(**columns)
+
+def memory_report(before, after):
+    """Compare the memory used by each column of two versions of a dataframe (in bytes)."""
+    report = pd.DataFrame({
+        'before': before.memory_usage(deep=True),
+        'after': after.memory_usage(deep=True),
+    })
+    report.loc['total'] = report.sum()
+    return report.assign(
+        dtype_before=before.dtypes, dtype_after=after.dtypes, reduction=lambda x: 1 - x.after / x.before
+    )
@@ -0,0 +1,129 @@
+"""Functions for computing correlation matrices in chunks and plotting them as annotated heatmaps."""
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.collections import PathCollection
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+
+class CorrelationAccumulator:
+    """
+    Running sums from which the Pearson correlation matrix of `columns` can be computed.
+
+    For every pair of columns, it keeps the number of rows where both are present and the
+    sums of x, x ** 2 and x * y over those rows (like `DataFrame.corr()`, missing values
+    are excluded pairwise). Chunks can be added one at a time with `update()`, and
+    accumulators built on different parts of the data can be combined with `merge()`.
+    Values are offset by the means of the first chunk to keep the sums small.
+    """
+
+    def __init__(self, columns, shift=None):
+        self.columns = pd.Index(columns)
+        k = len(self.columns)
+        self.shift = None if shift is None else np.asarray(shift, dtype='float64')
+        self.counts = np.zeros((k, k))
+        self.sums = np.zeros((k, k))
+        self.squares = np.zeros((k, k))
+        self.products = np.zeros((k, k))
+
+    def update(self, chunk):
+        """Add the rows of a dataframe (or 2D array with a column per entry of `columns`)."""
+        values = np.asarray(chunk[self.columns] if isinstance(chunk, pd.DataFrame) else chunk, dtype='float64')
+        present = ~np.isnan(values)
+        if self.shift is None:
+            counts = present.sum(axis=0)
+            self.shift = np.divide(
+                np.where(present, values, 0).sum(axis=0), counts, out=np.zeros(values.shape[1]), where=counts > 0
+            )
+
+        # sums[i, j] is the sum of column i over the rows where columns i and j are both present
+        weights = present.astype('float64')
+        centered = np.where(present, values - self.shift, 0)
+        self.counts += weights.T @ weights
+        self.sums += centered.T @ weights
+        self.squares += (centered ** 2).T @ weights
+        self.products += centered.T @ centered
+        return self
+
+    def merge(self, other):
+        """Add the sums from another accumulator over the same columns (e.g. from another worker)."""
+        if not self.columns.equals(other.columns):
+            raise ValueError('Cannot merge accumulators over different columns')
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift
+
+        # re-center the other sums on this accumulator's shift
+        delta = (self.shift - other.shift)[:, np.newaxis]
+        sums = other.sums - other.counts * delta
+        self.squares += other.squares - 2 * delta * other.sums + other.counts * delta ** 2
+        self.products += (
+            other.products - delta.T * other.sums - delta * other.sums.T + other.counts * delta * delta.T
+        )
+        self.sums += sums
+        self.counts += other.counts
+        return self
+
+    def corr(self, min_periods=1):
+        """Return the correlation matrix as a dataframe; pairs with fewer than `min_periods` rows are NaN."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = self.products - self.sums * self.sums.T / self.counts
+            variance = self.squares - self.sums ** 2 / self.counts
+            result = np.clip(covariance / np.sqrt(variance * variance.T), -1, 1)
+        result[self.counts < max(min_periods, 1)] = np.nan
+        return pd.DataFrame(result, index=self.columns, columns=self.columns)
+
+def streaming_corr(chunks, columns=None, min_periods=1):
+    """
+    Compute the correlation matrix of dataframes yielded by `chunks` (e.g. `pd.read_csv(..., chunksize=...)`)
+    without holding more than one chunk in memory. By default, the numeric columns of the first chunk are used.
+    """
+    accumulator = None
+    for chunk in chunks:
+        if accumulator is None:
+            accumulator = CorrelationAccumulator(
+                chunk.select_dtypes('number').columns if columns is None else columns
+            )
+        accumulator.update(chunk)
+    if accumulator is None:
+        raise ValueError('No chunks to compute the correlation from')
+    return accumulator.corr(min_periods=min_periods)
+
+def _label_path(text, fontsize):
+    """Outline of `text` in points, centered on the origin."""
+    path = TextPath((0, 0), text, size=fontsize)
+    (x0, y0), (x1, y1) = path.get_extents().get_points()
+    return path.transformed(Affine2D().translate(-(x0 + x1) / 2, -(y0 + y1) / 2))
+
+def correlation_heatmap(corr, ax=None, cmap='seismic', annotate=True, fmt=r'$\rho$ = {:.2f}',
+                        color='white', fontsize=14):
+    """
+    Plot a correlation matrix with `matshow()` and label each cell with its coefficient.
+
+    The labels are drawn as one collection of text outlines, rather than one `Text` per cell,
+    and each distinct label is laid out once, so large matrices render quickly.
+    """
+    ax = ax or plt.gca()
+    values = np.asarray(corr, dtype='float64')
+    im = ax.matshow(values, cmap=cmap, vmin=-1, vmax=1)
+    ax.figure.colorbar(im, ax=ax)
+
+    labels = [str(label).lower() for label in getattr(corr, 'columns', range(values.shape[1]))]
+    ax.set_xticks(np.arange(values.shape[1]), labels, rotation=45)
+    ax.set_yticks(np.arange(values.shape[0]), labels)
+
+    if annotate:
+        rows, cols = np.nonzero(~np.isnan(values))
+        texts = [fmt.format(coef) for coef in values[rows, cols]]
+        paths = {text: _label_path(text, fontsize) for text in set(texts)}
+        ax.add_collection(PathCollection(
+            [paths[text] for text in texts],
+            offsets=np.column_stack([cols, rows]),
+            offset_transform=ax.transData,
+            transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+            facecolors=color,
+            edgecolors='none',
+        ), autolim=False)
+    return ax
@@ -0,0 +1,227 @@
+"""Precomputed per-country aggregates of the ECDC COVID-19 dataset."""
+
+import numpy as np
+import pandas as pd
+
+_KINDS = ('daily', 'rolling', 'cumulative')
+
+# country names shortened for plotting
+REPLACEMENTS = {'countriesAndTerritories': {'United_States_of_America': 'USA'}}
+
+def load_covid(path, columns=('cases', 'countriesAndTerritories'), countries=None, start=None, end=None,
+               replacements=REPLACEMENTS):
+    """
+    Read only what a plot needs from the ECDC COVID-19 CSV: `columns`, indexed by date.
+
+    Only the requested columns are parsed; countries are read as categoricals so
+    `replacements` rename categories instead of scanning every cell, and rows are filtered
+    by country before any dates are parsed. `start` and `end` are inclusive, like slicing
+    a `DatetimeIndex`.
+    """
+    columns = list(columns)
+    country = 'countriesAndTerritories'
+    needed = set(columns) | {'dateRep'} | ({country} if countries is not None else set())
+    df = pd.read_csv(path, usecols=lambda column: column in needed, dtype={country: 'category'})
+
+    # apply each value mapping to its own column only
+    for column, mapping in (replacements or {}).items():
+        if column not in df:
+            continue
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            present = {old: new for old, new in mapping.items() if old in df[column].cat.categories}
+            df[column] = df[column].cat.rename_categories(present)
+        else:
+            df[column] = df[column].replace(mapping)
+
+    if countries is not None:
+        df = df[df[country].isin(countries)]
+
+    dates = pd.to_datetime(df.dateRep, format='%d/%m/%Y')
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= (dates >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        keep &= (dates < pd.Timestamp(end) + pd.Timedelta(days=1)).to_numpy()
+
+    return df.loc[keep, columns].set_axis(pd.DatetimeIndex(dates[keep], name='date')).sort_index(kind='stable')
+
+class CovidAggregates:
+    """
+    Dense country x day matrices of daily values, rolling means and running totals.
+
+    Everything is computed once with NumPy, so looking up one country's series is a row
+    lookup, and `append_day()` extends the aggregates without recomputing earlier days.
+    Days a country didn't report are 0 in the daily and cumulative matrices, and make the
+    rolling mean NaN for the windows containing them (like `rolling().mean()` does).
+    """
+
+    def __init__(self, countries, days, daily, reported, window=7, cumulative=None, rolling=None):
+        self.countries = pd.Index(countries, name='countriesAndTerritories')
+        self._first_day = pd.Timestamp(days[0])
+        self._n_days = len(days)
+        self.measures = list(daily)
+        self.window = window
+        self._daily = {measure: np.asarray(values, dtype='float64') for measure, values in daily.items()}
+        self._reported = np.asarray(reported, dtype=bool)
+        self._rows = {country: i for i, country in enumerate(self.countries)}
+        if cumulative is None or rolling is None:
+            self._compute()
+        else:
+            self._cumulative, self._rolling = dict(cumulative), dict(rolling)
+
+    # the matrices have spare columns for appended days; these are views of the filled part
+    @property
+    def days(self):
+        return pd.date_range(self._first_day, periods=self._n_days, freq='D', name='date')
+
+    @property
+    def reported(self):
+        return self._reported[:, :self._n_days]
+
+    @property
+    def daily(self):
+        return {measure: values[:, :self._n_days] for measure, values in self._daily.items()}
+
+    @property
+    def cumulative(self):
+        return {measure: values[:, :self._n_days] for measure, values in self._cumulative.items()}
+
+    @property
+    def rolling(self):
+        return {measure: values[:, :self._n_days] for measure, values in self._rolling.items()}
+
+    @classmethod
+    def from_frame(cls, covid, measures=('cases', 'deaths'), country='countriesAndTerritories', window=7):
+        """Build the aggregates from the ECDC data indexed by date (as in `plotting_with_pandas.py`)."""
+        rows, countries = pd.factorize(covid[country], sort=True)
+        dates = covid.index.normalize()
+        days = pd.date_range(dates.min(), dates.max(), freq='D')
+        cols = (dates - days[0]).days.to_numpy()
+
+        # scatter each (country, day) value into its cell
+        shape = (len(countries), len(days))
+        positions = rows * shape[1] + cols
+        daily = {
+            measure: np.bincount(
+                positions, weights=covid[measure].to_numpy(dtype='float64'), minlength=shape[0] * shape[1]
+            ).reshape(shape)
+            for measure in measures
+        }
+        reported = np.bincount(positions, minlength=shape[0] * shape[1]).reshape(shape) > 0
+        return cls(np.asarray(countries), days, daily, reported, window=window)
+
+    def _compute(self):
+        """Compute the running totals and rolling means from the daily matrices."""
+        self._cumulative = {measure: np.cumsum(values, axis=1) for measure, values in self.daily.items()}
+        self._rolling = {measure: self._rolling_mean(values, self.reported) for measure, values in self.daily.items()}
+
+    def _rolling_mean(self, values, reported):
+        """Mean of each `window`-day window ending on each day; NaN if any day in it is unreported."""
+        window = self.window
+        sums = np.cumsum(np.pad(values, ((0, 0), (1, 0))), axis=1)
+        missing = np.cumsum(np.pad(~reported, ((0, 0), (1, 0))), axis=1)
+
+        means = np.full(values.shape, np.nan)
+        if values.shape[1] >= window:
+            window_sums = sums[:, window:] - sums[:, :-window]
+            window_missing = missing[:, window:] - missing[:, :-window]
+            means[:, window - 1:] = np.where(window_missing == 0, window_sums / window, np.nan)
+        return means
+
+    def _matrix(self, kind, measure):
+        if kind not in _KINDS:
+            raise ValueError(f'kind must be one of {_KINDS}')
+        return getattr(self, kind)[measure]
+
+    def series(self, country, measure='cases', kind='daily'):
+        """Return one country's daily values, rolling mean or running total as a `pandas.Series`."""
+        return pd.Series(self._matrix(kind, measure)[self._rows[country]], index=self.days, name=country)
+
+    def frame(self, measure='cases', kind='daily', countries=None):
+        """Return a day x country dataframe (like `pivot_table()` / `unstack()` would) for `countries` (default: all)."""
+        rows = slice(None) if countries is None else [self._rows[country] for country in countries]
+        selected = self.countries if countries is None else pd.Index(countries, name=self.countries.name)
+        return pd.DataFrame(self._matrix(kind, measure)[rows].T, index=self.days, columns=selected)
+
+    def _reserve(self, n_days):
+        """Make room for `n_days` days, doubling the number of columns as needed (like `AppendBuffer`)."""
+        capacity = self._reported.shape[1]
+        if n_days <= capacity:
+            return
+        while capacity < n_days:
+            capacity = max(2 * capacity, 1)
+
+        def grow(matrix):
+            grown = np.empty((matrix.shape[0], capacity), dtype=matrix.dtype)
+            grown[:, :self._n_days] = matrix[:, :self._n_days]
+            return grown
+
+        self._reported = grow(self._reported)
+        for matrices in (self._daily, self._cumulative, self._rolling):
+            for measure in self.measures:
+                matrices[measure] = grow(matrices[measure])
+
+    def append_day(self, day_data, country='countriesAndTerritories'):
+        """
+        Add the next day's data (one row per reporting country) and update the aggregates incrementally.
+
+        Only the new column is computed and written in place: the running total adds to the
+        previous day's, and the rolling mean looks back `window` days. New countries get a row
+        of unreported days.
+        """
+        new_countries = [name for name in pd.unique(day_data[country]) if name not in self._rows]
+        if new_countries:
+            self._add_countries(new_countries)
+
+        day = self._n_days
+        self._reserve(day + 1)
+        rows = np.array([self._rows[name] for name in day_data[country]], dtype=np.intp)
+        self._reported[:, day] = False
+        self._reported[rows, day] = True
+
+        recent = slice(max(day + 1 - self.window, 0), day + 1)
+        for measure in self.measures:
+            column = np.zeros(len(self.countries))
+            np.add.at(column, rows, day_data[measure].to_numpy(dtype='float64'))
+            self._daily[measure][:, day] = column
+            self._cumulative[measure][:, day] = column + (self._cumulative[measure][:, day - 1] if day else 0)
+            self._rolling[measure][:, day] = self._rolling_mean(
+                self._daily[measure][:, recent], self._reported[:, recent]
+            )[:, -1]
+        self._n_days += 1
+
+    def _add_countries(self, names):
+        """Add rows for countries that haven't reported before."""
+        extra = len(names)
+        self.countries = self.countries.append(pd.Index(names, name=self.countries.name))
+        self._rows.update({name: len(self._rows) + i for i, name in enumerate(names)})
+        self._reported = np.vstack([self._reported, np.zeros((extra, self._reported.shape[1]), dtype=bool)])
+        for measure in self.measures:
+            padding = np.zeros((extra, self._daily[measure].shape[1]))
+            self._daily[measure] = np.vstack([self._daily[measure], padding])
+            self._cumulative[measure] = np.vstack([self._cumulative[measure], padding])
+            self._rolling[measure] = np.vstack([self._rolling[measure], np.full_like(padding, np.nan)])
+
+    def save(self, path):
+        """Store the aggregates in a compressed `.npz` file."""
+        np.savez_compressed(
+            path, countries=self.countries.to_numpy(dtype=str), days=self.days.to_numpy(), reported=self.reported,
+            window=self.window, **{
+                f'{kind}_{measure}': matrices[measure]
+                for kind, matrices in (('daily', self.daily), ('cumulative', self.cumulative), ('rolling', self.rolling))
+                for measure in self.measures
+            }
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read aggregates stored with `save()`."""
+        with np.load(path) as stored:
+            matrices = {
+                kind: {name[len(kind) + 1:]: stored[name] for name in stored.files if name.startswith(f'{kind}_')}
+                for kind in _KINDS
+            }
+            return cls(
+                stored['countries'], stored['days'], matrices['daily'], stored['reported'],
+                window=int(stored['window']), cumulative=matrices['cumulative'], rolling=matrices['rolling']
+            )
@@ -0,0 +1,173 @@
+"""Functions for aggregating (x, y) points into 2D density tiles that can be plotted at any zoom level."""
+
+import warnings
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+class DensityPyramid:
+    """
+    Counts of (x, y) points on square grids of 2, 4, 8, ... up to `2 ** max_level` bins per axis.
+
+    The points are binned once at the finest level; each coarser level sums 2 x 2 blocks of
+    the level below it. Plots then draw from the counts, so their cost depends on the
+    number of grid cells rather than the number of points.
+    """
+
+    def __init__(self, levels, x_edges, y_edges, log_x=False, log_y=False):
+        self.levels = levels
+        self.x_edges = x_edges
+        self.y_edges = y_edges
+        self.log_x = log_x
+        self.log_y = log_y
+
+    @classmethod
+    def from_values(cls, x, y, max_level=9, x_range=None, y_range=None, log_x=False, log_y=False):
+        """
+        Bin the points at the finest level and build every coarser level from it; NaNs are skipped.
+
+        The ranges (in data units) default to the extent of the points; with `log_x`/`log_y`
+        the bins are equal-width in log space.
+        """
+        x, y = _as_float(x, log_x), _as_float(y, log_y)
+        valid = ~(np.isnan(x) | np.isnan(y))
+
+        size = 2 ** max_level
+        x_range = np.log10(x_range) if log_x and x_range is not None else x_range
+        y_range = np.log10(y_range) if log_y and y_range is not None else y_range
+        x_edges = np.linspace(*_extent(x[valid], x_range), size + 1)
+        y_edges = np.linspace(*_extent(y[valid], y_range), size + 1)
+
+        pyramid = cls([np.zeros((size, size), dtype=np.int64)], x_edges, y_edges, log_x=log_x, log_y=log_y)
+        pyramid._add(x, y)
+        return pyramid
+
+    def update(self, x, y):
+        """
+        Add more points (e.g. the next chunk of a large dataset) to the existing bins.
+
+        The bin edges are fixed when the pyramid is created (by default, from the extent of the
+        first chunk), so pass `x_range` and `y_range` covering all of the data to `from_values()`
+        when more chunks will follow. Points outside the edges are dropped with a warning.
+        """
+        dropped = self._add(_as_float(x, self.log_x), _as_float(y, self.log_y))
+        if dropped:
+            warnings.warn(
+                f'{dropped} points fall outside the bin edges and were dropped; '
+                'pass x_range and y_range to from_values() to cover all chunks', stacklevel=2
+            )
+        return self
+
+    def _add(self, x, y):
+        """
+        Count already-transformed points into the finest level and rebuild the coarser levels;
+        returns the number of (non-missing) points outside the edges.
+        """
+        size = self.levels[-1].shape[0]
+        x_edges, y_edges = self.x_edges, self.y_edges
+
+        # cell of each point, keeping points on the upper edges in the last cell
+        inside = (x >= x_edges[0]) & (x <= x_edges[-1]) & (y >= y_edges[0]) & (y <= y_edges[-1])
+        dropped = int((~inside & ~np.isnan(x) & ~np.isnan(y)).sum())
+        x, y = x[inside], y[inside]
+        x_bin = np.minimum(((x - x_edges[0]) / (x_edges[-1] - x_edges[0]) * size).astype(np.intp), size - 1)
+        y_bin = np.minimum(((y - y_edges[0]) / (y_edges[-1] - y_edges[0]) * size).astype(np.intp), size - 1)
+        finest = self.levels[-1] + np.bincount(y_bin * size + x_bin, minlength=size * size).reshape(size, size)
+
+        # levels[i] has 2 ** i bins per axis, indexed [y, x]
+        levels = [finest]
+        while levels[0].shape[0] > 1:
+            half = levels[0].shape[0] // 2
+            levels.insert(0, levels[0].reshape(half, 2, half, 2).sum(axis=(1, 3)))
+        self.levels = levels
+        return dropped
+
+    def _level_for(self, gridsize, xlim=None, ylim=None):
+        """
+        Index of the coarsest level with at least `gridsize` bins per axis inside the (transformed)
+        `xlim`/`ylim` window, or the finest level.
+        """
+        fraction = min(_visible_fraction(self.x_edges, xlim), _visible_fraction(self.y_edges, ylim))
+        return min(int(np.ceil(np.log2(max(gridsize / fraction, 1)))), len(self.levels) - 1)
+
+    def _transform(self, limits, log):
+        return None if limits is None else tuple(np.log10(limits) if log else limits)
+
+    def tile(self, gridsize=64, xlim=None, ylim=None):
+        """
+        Return `(counts, x_edges, y_edges)` for the region inside `xlim`/`ylim` (in data units),
+        from the coarsest level with at least `gridsize` bins across that region on each axis,
+        so zooming in moves down to finer levels.
+        """
+        xlim, ylim = self._transform(xlim, self.log_x), self._transform(ylim, self.log_y)
+        level = self._level_for(gridsize, xlim, ylim)
+        counts = self.levels[level]
+        step = (len(self.x_edges) - 1) // counts.shape[0]
+        x_edges, y_edges = self.x_edges[::step], self.y_edges[::step]
+
+        # keep the cells overlapping the requested window
+        x_lo, x_hi = _cell_range(x_edges, xlim)
+        y_lo, y_hi = _cell_range(y_edges, ylim)
+        return counts[y_lo:y_hi, x_lo:x_hi], x_edges[x_lo:x_hi + 1], y_edges[y_lo:y_hi + 1]
+
+    def plot(self, kind='heatmap', gridsize=64, xlim=None, ylim=None, ax=None, cmap='gray_r', **kwargs):
+        """
+        Plot the density as a `'heatmap'`, a `'hexbin'` or a `'scatter'` of occupied cells
+        (sized by their counts), using only the counts for the visible region.
+        """
+        ax = ax or plt.gca()
+        # hexbin and scatter need cell centers from a finer grid than the plot resolution
+        counts, x_edges, y_edges = self.tile(gridsize if kind == 'heatmap' else gridsize * 4, xlim, ylim)
+        x_edges = 10 ** x_edges if self.log_x else x_edges
+        y_edges = 10 ** y_edges if self.log_y else y_edges
+
+        if kind == 'heatmap':
+            mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts, 0), cmap=cmap, **kwargs)
+            plt.colorbar(mesh, ax=ax)
+        else:
+            y_cell, x_cell = np.nonzero(counts)
+            x_centers = ((x_edges[:-1] + x_edges[1:]) / 2)[x_cell]
+            y_centers = ((y_edges[:-1] + y_edges[1:]) / 2)[y_cell]
+            weights = counts[y_cell, x_cell]
+            if kind == 'hexbin':
+                hexbin = ax.hexbin(
+                    x_centers, y_centers, C=weights, reduce_C_function=np.sum, gridsize=gridsize, cmap=cmap,
+                    xscale='log' if self.log_x else 'linear', yscale='log' if self.log_y else 'linear', **kwargs
+                )
+                plt.colorbar(hexbin, ax=ax)
+            elif kind == 'scatter':
+                ax.scatter(x_centers, y_centers, s=10 * np.sqrt(weights), **kwargs)
+            else:
+                raise ValueError("kind must be 'heatmap', 'hexbin' or 'scatter'")
+
+        if self.log_x:
+            ax.set_xscale('log')
+        if self.log_y:
+            ax.set_yscale('log')
+        return ax
+
+def _as_float(values, log):
+    values = np.asarray(values, dtype='float64')
+    return np.log10(values) if log else values
+
+def _extent(values, limits):
+    """The `(low, high)` range of the bins: `limits`, or the extent of `values` widened when it is a single value."""
+    low, high = limits if limits is not None else (values.min(), values.max()) if len(values) else (0, 1)
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return low, high
+
+def _visible_fraction(edges, limits):
+    """Fraction of the extent of `edges` inside `limits` (all of it without limits or when they miss it)."""
+    if limits is None:
+        return 1
+    visible = min(limits[1], edges[-1]) - max(limits[0], edges[0])
+    return visible / (edges[-1] - edges[0]) if visible > 0 else 1
+
+def _cell_range(edges, limits):
+    """First and last-plus-one cells of `edges` overlapping `limits` (all cells without limits)."""
+    if limits is None:
+        return 0, len(edges) - 1
+    lo = max(np.searchsorted(edges, limits[0], side='right') - 1, 0)
+    hi = min(np.searchsorted(edges, limits[1], side='left'), len(edges) - 1)
+    return lo, max(hi, lo + 1)
@@ -0,0 +1,152 @@
+"""Encoders for categorical columns that learn their vocabulary once and reuse it on new data."""
+
+import json
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+class MultiLabelEncoder:
+    """
+    One-hot encode delimited multi-label strings (like `'Rain;Cloudy;'`) into a sparse matrix.
+
+    Each distinct string is split only once, no matter how many rows repeat it, and the
+    vocabulary learned by `fit()` fixes the output columns for every later batch.
+    """
+
+    def __init__(self, sep=';', vocabulary=None):
+        self.sep = sep
+        self.vocabulary = list(vocabulary) if vocabulary is not None else None
+
+    def _tokenize(self, values):
+        """Factorize `values` and split each distinct string into its labels."""
+        codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+        labels = [[label for label in str(value).split(self.sep) if label] for value in uniques]
+        return codes, labels
+
+    def fit(self, values):
+        """Learn the sorted vocabulary of labels in `values`."""
+        _, labels = self._tokenize(values)
+        self.vocabulary = sorted({label for row_labels in labels for label in row_labels})
+        return self
+
+    def transform(self, values, dtype=np.uint8):
+        """Encode `values` as a CSR matrix with one column per vocabulary label; unseen labels are dropped."""
+        if self.vocabulary is None:
+            raise ValueError('MultiLabelEncoder must be fit before calling transform()')
+
+        codes, labels = self._tokenize(values)
+        position = {label: i for i, label in enumerate(self.vocabulary)}
+
+        # column indices of every distinct string, stored back to back
+        unique_indices = [sorted({position[label] for label in row_labels if label in position}) for row_labels in labels]
+        unique_lengths = np.array([len(indices) for indices in unique_indices] + [0], dtype=np.int64)
+        unique_starts = np.concatenate([[0], np.cumsum(unique_lengths[:-1])])
+        flat_indices = np.fromiter(
+            (i for indices in unique_indices for i in indices), dtype=np.int32, count=int(unique_lengths.sum())
+        )
+
+        # missing values (code -1) map to the empty entry at the end
+        codes = np.where(codes < 0, len(unique_indices), codes)
+        row_lengths = unique_lengths[codes]
+        indptr = np.concatenate([[0], np.cumsum(row_lengths)])
+
+        # gather each row's run of column indices from its distinct string's run
+        offsets = np.arange(indptr[-1]) - np.repeat(indptr[:-1], row_lengths)
+        indices = flat_indices[np.repeat(unique_starts[codes], row_lengths) + offsets]
+
+        return sparse.csr_matrix(
+            (np.ones(len(indices), dtype=dtype), indices, indptr), shape=(len(codes), len(self.vocabulary))
+        )
+
+    def fit_transform(self, values, dtype=np.uint8):
+        """Fit the vocabulary on `values` and encode them."""
+        return self.fit(values).transform(values, dtype=dtype)
+
+    def transform_frame(self, values, prefix='', dtype=np.uint8):
+        """Encode a `pandas.Series` as a dataframe of sparse columns named `prefix` + label."""
+        matrix = self.transform(values, dtype=dtype)
+        return pd.DataFrame.sparse.from_spmatrix(
+            matrix, index=getattr(values, 'index', None), columns=[prefix + label for label in self.vocabulary]
+        )
+
+    def to_dict(self):
+        """Return the fitted encoder as a JSON-serializable dictionary."""
+        return {'sep': self.sep, 'vocabulary': self.vocabulary}
+
+    @classmethod
+    def from_dict(cls, state):
+        """Recreate an encoder from the output of `to_dict()`."""
+        return cls(sep=state['sep'], vocabulary=state['vocabulary'])
+
+class CategoricalEncoder:
+    """
+    Learn the categories of several columns once and encode new batches with the same layout.
+
+    Codes are looked up against the stored categories, so new batches don't need their
+    uniques recomputed and sorted, and unseen values are coded as -1 (missing).
+    """
+
+    def __init__(self, categories=None):
+        self.categories = {column: list(values) for column, values in (categories or {}).items()}
+        self._indexes = {column: pd.Index(values) for column, values in self.categories.items()}
+
+    def fit(self, df, columns):
+        """Learn the sorted categories of each of `columns` in `df`."""
+        for column in columns:
+            values = df[column].dropna().unique()
+            self.categories[column] = sorted(values.tolist())
+            self._indexes[column] = pd.Index(self.categories[column])
+        return self
+
+    def codes(self, df):
+        """Return the integer code of every value in the encoded columns of `df`."""
+        return pd.DataFrame({
+            column: self._indexes[column].get_indexer(df[column]).astype(
+                np.min_scalar_type(-max(len(self.categories[column]), 1))
+            )
+            for column in self.categories
+        }, index=df.index)
+
+    def transform(self, df):
+        """Return a copy of `df` with the encoded columns as categoricals with the learned categories."""
+        codes = self.codes(df)
+        return df.assign(**{
+            column: pd.Categorical.from_codes(codes[column], categories=self.categories[column])
+            for column in self.categories
+        })
+
+    def one_hot(self, df, prefix_sep='_', dtype=np.uint8):
+        """One-hot encode the encoded columns of `df` into sparse columns, one per learned category."""
+        codes = self.codes(df)
+        encoded = []
+        for column, categories in self.categories.items():
+            column_codes = codes[column].to_numpy()
+            rows = np.flatnonzero(column_codes >= 0)
+            matrix = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=dtype), (rows, column_codes[rows])), shape=(len(df), len(categories))
+            )
+            encoded.append(pd.DataFrame.sparse.from_spmatrix(
+                matrix, index=df.index, columns=[f'{column}{prefix_sep}{category}' for category in categories]
+            ))
+        return pd.concat(encoded, axis=1)
+
+    def to_dict(self):
+        """Return the fitted encoder as a JSON-serializable dictionary."""
+        return {'categories': self.categories}
+
+    @classmethod
+    def from_dict(cls, state):
+        """Recreate an encoder from the output of `to_dict()`."""
+        return cls(categories=state['categories'])
+
+    def save(self, path):
+        """Write the learned categories to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Read an encoder saved with `save()`."""
+        with open(path, encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))
@@ -0,0 +1,125 @@
+"""Append-only earthquake event store, partitioned by day in Parquet and keyed by event id."""
+
+import os
+import pathlib
+
+import pandas as pd
+
+from places import parse_places
+
+_MS_PER_DAY = 86_400_000
+
+# columns kept in the index so upserts can compare versions and queries can pick partitions without opening them
+_INDEX_COLUMNS = ['day', 'updated', 'magType', 'parsed_place']
+
+class EventStore:
+    """
+    Earthquake events stored as one Parquet file per day (`day=YYYY-MM-DD/events.parquet`).
+
+    Upserts only rewrite the days they touch and keep the newest version of each event (by
+    `updated`), so applying the same or older revisions leaves the store unchanged. A small
+    index of event id to day and `updated` (plus `magType` and `parsed_place`) lets upserts
+    skip stale versions and queries read only the partitions holding matching events.
+    """
+
+    def __init__(self, root, key='id'):
+        self.root = pathlib.Path(root)
+        self.key = key
+        self._index_path = self.root / '_index.parquet'
+
+    def _partition_path(self, day):
+        return self.root / f'day={day}' / 'events.parquet'
+
+    @staticmethod
+    def _write(df, path):
+        """Write `df` to `path` atomically, so a crash never leaves a half-written partition."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix('.tmp')
+        df.to_parquet(temp_path, index=False)
+        os.replace(temp_path, path)
+
+    def _read_index(self):
+        if self._index_path.exists():
+            return pd.read_parquet(self._index_path)
+        return pd.DataFrame({self.key: pd.Series(dtype=object), 'day': pd.Series(dtype=object)})
+
+    def _latest(self, df):
+        """Keep one row per event: the most recently updated one, or the last one given."""
+        if 'updated' in df:
+            df = df.sort_values('updated', kind='stable')
+        return df.drop_duplicates(subset=self.key, keep='last')
+
+    def upsert(self, events):
+        """
+        Insert new events and replace older versions of existing ones; returns the number of days rewritten.
+
+        Events without a `parsed_place` column (e.g. straight from the API) get one from their `place`.
+        """
+        if 'parsed_place' not in events and 'place' in events:
+            events = events.assign(parsed_place=parse_places(events.place).region.to_numpy())
+        events = self._latest(events.assign(
+            day=pd.to_datetime(events.time // _MS_PER_DAY * _MS_PER_DAY, unit='ms').dt.strftime('%Y-%m-%d')
+        ))
+        index = self._read_index()
+
+        # ignore versions that aren't newer than the stored ones (before anything can move days)
+        if 'updated' in events and 'updated' in index:
+            stored_updated = index.set_index(self.key).updated.reindex(events[self.key]).to_numpy()
+            events = events[~(stored_updated >= events.updated.to_numpy())]
+        if events.empty:
+            return 0
+
+        # a revised event time can move an event to another day, so drop it from its old one
+        previous = index.set_index(self.key).day.reindex(events[self.key])
+        moved = previous.notna() & (previous.to_numpy() != events.day.to_numpy())
+        removals = pd.Series(events[self.key].to_numpy()[moved.to_numpy()], index=previous[moved].to_numpy())
+
+        days = set(events.day) | set(removals.index)
+        for day in sorted(days):
+            path = self._partition_path(day)
+            stored = pd.read_parquet(path) if path.exists() else None
+            if stored is not None and day in removals.index:
+                stored = stored[~stored[self.key].isin(removals.loc[[day]])]
+
+            new = events[events.day == day].drop(columns='day')
+            merged = new if stored is None else self._latest(pd.concat([stored, new], ignore_index=True))
+            if merged.empty:
+                path.unlink()
+            else:
+                self._write(merged.sort_values('time', ignore_index=True), path)
+
+        index_columns = [self.key] + [column for column in _INDEX_COLUMNS if column in events]
+        kept = index[~index[self.key].isin(events[self.key])]
+        index = pd.concat([kept, events[index_columns]] if len(kept) else [events[index_columns]], ignore_index=True)
+        self._write(index, self._index_path)
+        return len(days)
+
+    def query(self, start=None, end=None, mag_type=None, parsed_place=None, columns=None):
+        """
+        Return the events from `start` (inclusive) to `end` (exclusive), optionally only those
+        with the given `magType` and/or `parsed_place`, reading only partitions that can match.
+        """
+        index = self._read_index()
+        if start is not None:
+            index = index[index.day >= pd.Timestamp(start).strftime('%Y-%m-%d')]
+        if end is not None:
+            index = index[index.day <= pd.Timestamp(end).strftime('%Y-%m-%d')]
+
+        # push the column filters down into the index and the parquet reader
+        filters = []
+        for column, value in (('magType', mag_type), ('parsed_place', parsed_place)):
+            if value is not None:
+                index = index[index[column] == value]
+                filters.append((column, '==', value))
+        if start is not None:
+            filters.append(('time', '>=', pd.Timestamp(start).value // 10**6))
+        if end is not None:
+            filters.append(('time', '<', pd.Timestamp(end).value // 10**6))
+
+        frames = [
+            pd.read_parquet(self._partition_path(day), columns=columns, filters=filters or None)
+            for day in sorted(index.day.unique())
+        ]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
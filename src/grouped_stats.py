@@ -0,0 +1,409 @@
+"""Functions for computing per-group statistics for plots in a single pass over the data."""
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+def _group_codes(groups, values=None):
+    """
+    Integer code of each row's group (-1 for missing) and the group labels, in order of appearance.
+
+    Without `groups`, every row belongs to one group named after `values`.
+    """
+    if groups is None:
+        return np.zeros(len(values), dtype=np.intp), pd.Index([getattr(values, 'name', None)])
+    codes, labels = pd.factorize(pd.Series(groups, copy=False))
+    return codes, pd.Index(labels)
+
+class GroupedHistogram:
+    """
+    Histogram counts for every group on shared bins, computed with one `np.bincount()`.
+
+    Counts at a coarser resolution are sums of adjacent fine bins, so `coarsen()` derives
+    them without touching the data again.
+    """
+
+    def __init__(self, counts, edges, groups):
+        self.counts = counts
+        self.edges = edges
+        self.groups = groups
+
+    @classmethod
+    def from_values(cls, values, groups=None, bins=10, range=None):  # pylint: disable=redefined-builtin
+        """
+        Count `values` into `bins` equal-width bins (or the given edges) for each of `groups`.
+
+        Like `np.histogram()`, bins include their left edge and the last bin also includes its
+        right edge; values outside the edges and rows with missing values or groups are skipped.
+        """
+        codes, labels = _group_codes(groups, values)
+        values = np.asarray(values, dtype='float64')
+        valid = ~np.isnan(values) & (codes >= 0)
+        edges = np.histogram_bin_edges(values[valid], bins=bins, range=range)
+        n_bins = len(edges) - 1
+
+        # bin of each value, with values on the last edge counted in the last bin
+        bin_index = np.searchsorted(edges, values, side='right') - 1
+        bin_index[values == edges[-1]] = n_bins - 1
+        valid &= (bin_index >= 0) & (bin_index < n_bins)
+
+        counts = np.bincount(
+            codes[valid] * n_bins + bin_index[valid], minlength=len(labels) * n_bins
+        ).reshape(len(labels), n_bins)
+        return cls(counts, edges, labels)
+
+    def coarsen(self, factor):
+        """Merge every `factor` adjacent bins (the number of bins must be a multiple of `factor`)."""
+        n_groups, n_bins = self.counts.shape
+        if n_bins % factor:
+            raise ValueError(f'Cannot merge {n_bins} bins in groups of {factor}')
+        return GroupedHistogram(
+            self.counts.reshape(n_groups, n_bins // factor, factor).sum(axis=2), self.edges[::factor], self.groups
+        )
+
+    def frame(self):
+        """Return the counts as a dataframe with a row per bin (labeled by its left edge) and a column per group."""
+        return pd.DataFrame(self.counts.T, index=pd.Index(self.edges[:-1], name='bin'), columns=self.groups)
+
+    def plot(self, kind='overlay', groups=None, ax=None, alpha=0.4, legend=True, **kwargs):
+        """
+        Plot the histograms overlaid on one `Axes` (`kind='overlay'`) or one subplot per group (`kind='facet'`).
+
+        Groups without any counts are skipped; overlaid groups get a legend unless `legend=False`.
+        Additional keyword arguments go to `Axes.hist()`.
+        """
+        groups = [
+            group for group in (self.groups if groups is None else groups)
+            if self.counts[self.groups.get_loc(group)].any()
+        ]
+
+        if kind == 'overlay':
+            ax = ax or plt.gca()
+            for group in groups:
+                self._hist(ax, group, alpha=alpha, label=group, **kwargs)
+            if legend:
+                ax.legend()
+            return ax
+
+        if kind == 'facet':
+            fig, axes = plt.subplots(1, len(groups), figsize=(4 * len(groups), 3), sharey=True, squeeze=False)
+            for ax, group in zip(axes.flatten(), groups):
+                self._hist(ax, group, **kwargs)
+                ax.set_title(group)
+            return axes.flatten()
+
+        raise ValueError("kind must be 'overlay' or 'facet'")
+
+    def _hist(self, ax, group, **kwargs):
+        """Draw one group's precomputed counts with `Axes.hist()` by weighting each bin's left edge."""
+        return ax.hist(self.edges[:-1], bins=self.edges, weights=self.counts[self.groups.get_loc(group)], **kwargs)
+
+def grouped_histogram(values, groups=None, bins=10, range=None):  # pylint: disable=redefined-builtin
+    """Compute histogram counts of `values` for each of `groups` on shared bins (see `GroupedHistogram`)."""
+    return GroupedHistogram.from_values(values, groups, bins=bins, range=range)
+
+def _quantile_positions(n, probabilities):
+    """Lower and upper order statistics and interpolation weights for linear-interpolation quantiles."""
+    positions = (n - 1) * np.asarray(probabilities)
+    lower = np.floor(positions).astype(np.intp)
+    return lower, np.minimum(lower + 1, n - 1), positions - lower
+
+def _exact_quartiles(block):
+    """Quartiles of each column of a 2D block (no missing values), partitioning around only the needed ranks."""
+    lower, upper, weights = _quantile_positions(len(block), (0.25, 0.5, 0.75))
+    ranked = np.partition(block, np.unique(np.concatenate([lower, upper])), axis=0)
+    return ranked[lower] * (1 - weights[:, np.newaxis]) + ranked[upper] * weights[:, np.newaxis]
+
+def _binned_quartiles(values, bins):
+    """Approximate quartiles of `values` from their histogram on `bins` equal-width bins."""
+    low, high = values.min(), values.max()
+    if low == high:
+        return np.full(3, low)
+    counts = np.bincount(
+        np.minimum(((values - low) / (high - low) * bins).astype(np.intp), bins - 1), minlength=bins
+    )
+    cumulative = np.cumsum(counts)
+    targets = (len(values) - 1) * np.array([0.25, 0.5, 0.75]) + 1
+    # interpolate within the bin reaching each target rank
+    index = np.searchsorted(cumulative, targets)
+    before = np.where(index > 0, cumulative[index - 1], 0)
+    fraction = (targets - before) / counts[index]
+    return low + (index + fraction) * (high - low) / bins
+
+def _column_stats(values, quartiles, whis, label):
+    """Summary of one column of one group in the format `Axes.bxp()` takes."""
+    q1, med, q3 = quartiles
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - whis * iqr, q3 + whis * iqr
+    inside = values[(values >= low_fence) & (values <= high_fence)]
+    notch = 1.57 * iqr / np.sqrt(len(values))
+    return {
+        'label': label, 'mean': values.mean(), 'med': med, 'q1': q1, 'q3': q3, 'iqr': iqr,
+        'cilo': med - notch, 'cihi': med + notch,
+        # like `Axes.boxplot()`, whiskers never end inside the box
+        'whislo': min(inside.min(), q1) if len(inside) else q1, 'whishi': max(inside.max(), q3) if len(inside) else q3,
+        'fliers': np.concatenate([values[values < low_fence], values[values > high_fence]]),
+    }
+
+def box_stats(df, columns, by=None, whis=1.5, exact_limit=None, bins=4096):
+    """
+    Compute box plot statistics (quartiles, whiskers and outliers) of `columns` for each group of `by`.
+
+    The rows are ordered by group once; each group's quartiles for all of the columns then
+    come from one `np.partition()` around the needed ranks instead of a full sort. Groups with
+    more than `exact_limit` rows use approximate quartiles from a histogram with `bins` bins;
+    whiskers and outliers are always exact. Quartiles match `np.percentile()` (and therefore
+    `Axes.boxplot()`), and missing values are ignored.
+
+    Returns:
+        A dictionary of group -> list of one statistics dictionary per column, ready for `Axes.bxp()`.
+        Without `by`, the only group is `None`.
+    """
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    values = df[columns].to_numpy(dtype='float64')
+    if by is None:
+        codes, labels = np.zeros(len(df), dtype=np.intp), pd.Index([None])
+    else:
+        codes, labels = pd.factorize(df[by], sort=True)
+
+    # order the rows by group once, so each group is a contiguous block
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+
+    stats = {}
+    for group, start, stop in zip(labels, bounds[:-1], bounds[1:]):
+        block = values[order[start:stop]]
+        complete = not np.isnan(block).any()
+        if complete and (exact_limit is None or len(block) <= exact_limit):
+            quartiles = _exact_quartiles(block).T
+        else:
+            quartiles = [None] * len(columns)
+
+        group_stats = []
+        for i, column in enumerate(columns):
+            column_values = block[:, i] if complete else block[~np.isnan(block[:, i]), i]
+            if not len(column_values):
+                continue
+            if quartiles[i] is None:
+                quartiles[i] = (
+                    _binned_quartiles(column_values, bins) if exact_limit is not None and len(column_values) > exact_limit
+                    else _exact_quartiles(column_values[:, np.newaxis])[:, 0]
+                )
+            group_stats.append(_column_stats(column_values, quartiles[i], whis, column))
+        stats[group] = group_stats
+    return stats
+
+def grouped_boxplot(stats, subplots=True, layout=None, figsize=None, ax=None, **kwargs):
+    """
+    Draw statistics from `box_stats()` with `Axes.bxp()`: one subplot per group with a box per
+    column (`subplots=True`), or every box on one `Axes` labeled by group (and column, if
+    there are several). `ax` can only be given without subplots. Additional keyword arguments
+    go to `Axes.bxp()`.
+    """
+    if subplots and ax is not None:
+        raise ValueError('ax can only be given with subplots=False')
+    if not subplots:
+        ax = ax or plt.figure(figsize=figsize).gca()
+        boxes = [
+            {**column_stats, 'label': group if len(group_stats) == 1 else f'{group}, {column_stats["label"]}'}
+            for group, group_stats in stats.items() for column_stats in group_stats
+        ]
+        ax.bxp(boxes, **kwargs)
+        return ax
+
+    nrows, ncols = layout or (1, len(stats))
+    _, axes = plt.subplots(nrows, ncols, figsize=figsize, sharey=True, squeeze=False)
+    for group_ax, (group, group_stats) in zip(axes.flatten(), stats.items()):
+        group_ax.bxp(group_stats, **kwargs)
+        group_ax.set_title(group)
+    for unused_ax in axes.flatten()[len(stats):]:
+        unused_ax.set_visible(False)
+    return axes
+
+_MS_PER_DAY = 86_400_000
+
+class DailyEventCounts:
+    """
+    Place x day matrices of event counts (and sums of columns like `tsunami`) for every place at once.
+
+    Epoch-millisecond timestamps are bucketed into (UTC) days with integer division, so the
+    matrices take one `np.bincount()` each, and any place's daily series is a row lookup.
+    """
+
+    def __init__(self, places, days, counts):
+        self.places = pd.Index(places)
+        self.days = pd.DatetimeIndex(days, name='time')
+        self.counts = counts
+        self._rows = {place: i for i, place in enumerate(self.places)}
+
+    @classmethod
+    def from_frame(cls, df, place='parsed_place', time='time', sums=('tsunami',), count_name='earthquake'):
+        """
+        Count the events in `df` (with epoch-millisecond `time`) per `place` and day as
+        `count_name`, and add up each of the `sums` columns the same way. Events without a place are skipped.
+        """
+        rows, places = pd.factorize(df[place], sort=True)
+        day_numbers = df[time].to_numpy(dtype='int64') // _MS_PER_DAY
+        first_day = day_numbers.min()
+        n_days = day_numbers.max() - first_day + 1
+
+        valid = rows >= 0
+        positions = rows[valid] * n_days + (day_numbers[valid] - first_day)
+        shape = (len(places), n_days)
+        counts = {count_name: np.bincount(positions, minlength=shape[0] * shape[1]).reshape(shape)}
+        for column in sums:
+            counts[column] = np.bincount(
+                positions, weights=df[column].to_numpy()[valid], minlength=shape[0] * shape[1]
+            ).reshape(shape).astype('int64')
+
+        days = pd.to_datetime(first_day * _MS_PER_DAY + np.arange(n_days) * _MS_PER_DAY, unit='ms')
+        return cls(np.asarray(places), days, counts)
+
+    def frame(self, place, trim=True):
+        """
+        Return a place's daily counts with a row per day and a column per count. With `trim`, only
+        the days from its first to its last event are kept (like `resample('1D')` on that place's events).
+        """
+        row = self._rows[place]
+        result = pd.DataFrame({name: counts[row] for name, counts in self.counts.items()}, index=self.days)
+        if trim:
+            active = np.flatnonzero(next(iter(self.counts.values()))[row])
+            result = result.iloc[active[0]:active[-1] + 1] if len(active) else result.iloc[:0]
+        return result
+
+    def totals(self):
+        """Return the total of each count per place."""
+        return pd.DataFrame({name: counts.sum(axis=1) for name, counts in self.counts.items()}, index=self.places)
+
+_NORMALIZE = {'index': 1, 'columns': 0, 'all': None}
+
+class ContingencyTable:
+    """
+    Counts of each combination of two categorical columns, computed with one `np.bincount()` on their codes.
+
+    Normalized, stacked and unstacked views, as well as the expected counts and chi-square
+    test of independence, are all derived from the same counts without touching the data again.
+    """
+
+    def __init__(self, counts, index, columns):
+        self.counts = counts
+        self.index = index
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, df, index, columns, values=None):
+        """
+        Count the rows of `df` for each combination of `index` and `columns` (sorted, or in category
+        order for categoricals, keeping only observed values); rows with a missing key are skipped.
+        With `values`, only rows where that column is present are counted (like `groupby().count()`).
+        """
+        row_codes, row_labels = pd.factorize(df[index], sort=True)
+        column_codes, column_labels = pd.factorize(df[columns], sort=True)
+        valid = (row_codes >= 0) & (column_codes >= 0)
+        if values is not None:
+            valid &= df[values].notna().to_numpy()
+
+        n_columns = len(column_labels)
+        counts = np.bincount(
+            row_codes[valid] * n_columns + column_codes[valid], minlength=len(row_labels) * n_columns
+        ).reshape(len(row_labels), n_columns)
+        return cls(counts, pd.Index(row_labels, name=index), pd.Index(column_labels, name=columns))
+
+    def frame(self, normalize=None):
+        """
+        Return the table as a dataframe, optionally as fractions of each row's total (`normalize='index'`),
+        each column's total (`'columns'`) or the grand total (`'all'`), like `pd.crosstab()`.
+        """
+        counts = self.counts
+        if normalize is not None:
+            totals = counts.sum(axis=_NORMALIZE[normalize], keepdims=normalize != 'all')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                counts = counts / totals
+        return pd.DataFrame(counts, index=self.index, columns=self.columns)
+
+    def stacked(self, normalize=None):
+        """Return the table as a series with an (`index`, `columns`) `MultiIndex`, like `groupby().count()`."""
+        return self.frame(normalize).stack()
+
+    def expected(self):
+        """Expected counts if the two columns were independent."""
+        return pd.DataFrame(
+            np.outer(self.counts.sum(axis=1), self.counts.sum(axis=0)) / self.counts.sum(),
+            index=self.index, columns=self.columns,
+        )
+
+    def chi2(self):
+        """Chi-square test of independence: the statistic, degrees of freedom and p-value."""
+        expected = self.expected().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            statistic = np.nansum((self.counts - expected) ** 2 / expected)
+        dof = (self.counts.shape[0] - 1) * (self.counts.shape[1] - 1)
+        return statistic, dof, stats.chi2.sf(statistic, dof)
+
+def contingency_table(df, index, columns, values=None):
+    """Count the rows of `df` for each combination of `index` and `columns` (see `ContingencyTable`)."""
+    return ContingencyTable.from_frame(df, index, columns, values=values)
+
+class BinnedPivot:
+    """
+    Counts of events per bin of a numeric column (e.g. integer magnitude) and category (e.g. `magType`).
+
+    The counts are a dense bin x category matrix filled with one 2D `np.bincount()`. New events
+    can be added with `update()`, which grows the matrix for new bins or categories, so charts of
+    a live feed only need the new events counted.
+    """
+
+    def __init__(self, value, columns, width=1):
+        self.value = value
+        self.columns = columns
+        self.width = width
+        self.first_bin = 0
+        self.categories = pd.Index([], name=columns)
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df, value='mag', columns='magType', width=1):
+        """Count the rows of `df` per `width`-wide bin of `value` (like `np.floor(value / width)`) and `columns`."""
+        return cls(value, columns, width=width).update(df)
+
+    def update(self, events):
+        """Add the counts of new events (rows with a missing value or category are skipped)."""
+        values = events[self.value].to_numpy(dtype='float64')
+        categories = pd.Series(events[self.columns], copy=False)
+        valid = ~np.isnan(values) & categories.notna().to_numpy()
+        if not valid.any():
+            return self
+        bins = np.floor(values[valid] / self.width).astype(np.int64)
+
+        # grow the matrix for bins and categories we haven't seen before
+        previous = self.categories
+        new = pd.Index(np.asarray(pd.unique(categories[valid]))).difference(previous)
+        if len(new):
+            self.categories = (new if previous.empty else previous.append(new)).sort_values().rename(self.columns)
+        column_codes = self.categories.get_indexer(categories[valid])
+        first_bin = min(bins.min(), self.first_bin) if len(self.counts) else bins.min()
+        last_bin = max(bins.max(), self.first_bin + len(self.counts) - 1)
+        counts = np.zeros((last_bin - first_bin + 1, len(self.categories)), dtype=np.int64)
+        if self.counts.size:
+            start = self.first_bin - first_bin
+            counts[start:start + len(self.counts), self.categories.get_indexer(previous)] = self.counts
+
+        n_columns = len(self.categories)
+        counts += np.bincount(
+            (bins - first_bin) * n_columns + column_codes, minlength=counts.size
+        ).reshape(counts.shape)
+        self.counts, self.first_bin = counts, first_bin
+        return self
+
+    def table(self):
+        """Return the counts of the bins with any events as a `ContingencyTable`."""
+        occupied = self.counts.any(axis=1)
+        bins = (self.first_bin + np.flatnonzero(occupied)) * self.width
+        return ContingencyTable(
+            self.counts[occupied], pd.Index(bins.astype('float64'), name=f'{self.value}_bin'), self.categories
+        )
+
+    def frame(self, normalize=None):
+        """Return a bin x category dataframe of counts, or of fractions of each bin's total with `normalize='index'`."""
+        return self.table().frame(normalize)
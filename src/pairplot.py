@@ -0,0 +1,132 @@
+"""Functions for summarizing every pair of columns once and plotting them as a scatter matrix."""
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+def _bin_codes(values, edges):
+    """Bin of each value on equal-width `edges` (`len(edges) - 1` for missing values), with the maximum in the last bin."""
+    n_bins = len(edges) - 1
+    codes = np.full(len(values), n_bins, dtype=np.intp)
+    present = ~np.isnan(values)
+    scaled = (values[present] - edges[0]) / (edges[-1] - edges[0]) * n_bins
+    codes[present] = np.minimum(scaled.astype(np.intp), n_bins - 1)
+    return codes
+
+class PairSummary:
+    """
+    Everything needed to draw a scatter matrix of many columns without going back to the data.
+
+    Each column is binned once; the binned codes give every pair's 2D histogram (one
+    `np.bincount()` per pair) and each column's histogram. A finer histogram of each column
+    is smoothed with a Gaussian kernel (Scott's rule, like `scipy.stats.gaussian_kde`) for the
+    KDE diagonal, so switching between diagonals doesn't recompute anything. A random sample
+    of rows is also kept for drawing actual points.
+    """
+
+    def __init__(self, columns, edges, histograms, pairs, kde_grid, kde, sample):
+        self.columns = pd.Index(columns)
+        self.edges = edges
+        self.histograms = histograms
+        self.pairs = pairs
+        self.kde_grid = kde_grid
+        self.kde = kde
+        self.sample = sample
+
+    @classmethod
+    def from_frame(cls, df, columns=None, bins=20, kde_bins=512, sample_size=1_000, seed=0):
+        """Summarize the numeric columns of `df` (or `columns`) with `bins` bins per column."""
+        columns = df.select_dtypes('number').columns if columns is None else pd.Index(columns)
+        values = {column: df[column].to_numpy(dtype='float64') for column in columns}
+
+        edges, codes, histograms, kde_grid, kde = [], [], [], [], []
+        for column in columns:
+            x = values[column]
+            present = x[~np.isnan(x)]
+            low, high = (present.min(), present.max()) if len(present) else (0, 1)
+            if low == high:
+                low, high = low - 0.5, high + 0.5
+            edges.append(np.linspace(low, high, bins + 1))
+            codes.append(_bin_codes(x, edges[-1]))
+            histograms.append(np.bincount(codes[-1], minlength=bins + 1)[:bins])
+
+            # binned KDE: smooth a fine histogram with a Gaussian kernel
+            fine_edges = np.linspace(low, high, kde_bins + 1)
+            fine = np.bincount(_bin_codes(present, fine_edges), minlength=kde_bins).astype('float64')
+            kde_grid.append((fine_edges[:-1] + fine_edges[1:]) / 2)
+            kde.append(_smooth(fine, present, fine_edges[1] - fine_edges[0]))
+
+        # 2D histogram of each pair, indexed [bin of the first column, bin of the second column];
+        # missing values land in an extra bin that is dropped afterwards
+        pairs = {}
+        for i in range(len(columns)):
+            rows = codes[i] * (bins + 1)
+            for j in range(i + 1, len(columns)):
+                pairs[i, j] = np.bincount(
+                    rows + codes[j], minlength=(bins + 1) ** 2
+                ).reshape(bins + 1, bins + 1)[:bins, :bins]
+
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(len(df), size=min(sample_size, len(df)), replace=False))
+        sample = pd.DataFrame({column: values[column][rows] for column in columns})
+        return cls(columns, edges, histograms, pairs, kde_grid, kde, sample)
+
+    def pair(self, y, x):
+        """2D histogram with a row per bin of column `y` and a column per bin of column `x`."""
+        i, j = self.columns.get_loc(y), self.columns.get_loc(x)
+        return self.pairs[i, j] if i < j else self.pairs[j, i].T
+
+    def plot(self, diagonal='hist', kind='hist', figsize=(10, 10), cmap='gray_r', alpha=0.5, **kwargs):
+        """
+        Draw the scatter matrix with `'hist'` or `'kde'` on the diagonal and, off the diagonal,
+        2D histograms (`kind='hist'`) or the sampled points (`kind='scatter'`).
+
+        Returns the array of `Axes`, like `pandas.plotting.scatter_matrix()`.
+        """
+        if diagonal not in ('hist', 'kde'):
+            raise ValueError("diagonal must be 'hist' or 'kde'")
+        if kind not in ('hist', 'scatter'):
+            raise ValueError("kind must be 'hist' or 'scatter'")
+
+        k = len(self.columns)
+        fig, axes = plt.subplots(k, k, figsize=figsize, squeeze=False)
+        for i, y in enumerate(self.columns):
+            for j, x in enumerate(self.columns):
+                ax = axes[i, j]
+                if i == j and diagonal == 'hist':
+                    edges = self.edges[i]
+                    ax.hist(edges[:-1], bins=edges, weights=self.histograms[i], **kwargs)
+                elif i == j:
+                    ax.plot(self.kde_grid[i], self.kde[i], **kwargs)
+                elif kind == 'hist':
+                    counts = self.pair(y, x)
+                    ax.imshow(
+                        np.ma.masked_equal(counts, 0), origin='lower', aspect='auto', cmap=cmap, interpolation='none',
+                        extent=(self.edges[j][0], self.edges[j][-1], self.edges[i][0], self.edges[i][-1]),
+                    )
+                else:
+                    ax.scatter(self.sample[x], self.sample[y], s=5, alpha=alpha, **kwargs)
+                ax.set_xlim(self.edges[j][0], self.edges[j][-1])
+                if i != j:
+                    ax.set_ylim(self.edges[i][0], self.edges[i][-1])
+
+                # only label the outer axes
+                ax.set_xlabel(x if i == k - 1 else '')
+                ax.set_ylabel(y if j == 0 else '')
+                ax.tick_params(labelbottom=i == k - 1, labelleft=j == 0)
+        fig.subplots_adjust(wspace=0, hspace=0)
+        return axes
+
+def _smooth(counts, values, bin_width):
+    """Gaussian KDE of `values` evaluated at the bin centers, from their histogram `counts`."""
+    if len(values) < 2 or not values.std(ddof=1):
+        return counts / max(counts.sum() * bin_width, 1)
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    offsets = np.arange(-len(counts) + 1, len(counts)) * bin_width
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    n = len(counts)
+    return np.convolve(counts, kernel)[n - 1:2 * n - 1] / counts.sum()
+
+def pair_summary(df, columns=None, bins=20, kde_bins=512, sample_size=1_000, seed=0):
+    """Bin every column and pair of columns of `df` once for plotting (see `PairSummary`)."""
+    return PairSummary.from_frame(df, columns, bins=bins, kde_bins=kde_bins, sample_size=sample_size, seed=seed)
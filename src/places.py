@@ -0,0 +1,68 @@
+"""Functions for parsing the `place` descriptions of USGS earthquakes (like `'9km NE of Aguanga, CA'`)."""
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+# "<distance>km <bearing> of <locality>, <region>", where only the locality is always present
+_PLACE_PATTERN = (
+    r'^(?:(?P<distance_km>\d+(?:\.\d+)?) ?km (?P<bearing>[NSEW]{1,3}) of )?'
+    r'(?P<locality>.+?)(?:, (?P<region>[^,]+))?$'
+)
+
+# directions and qualifiers around region names, e.g. "South of the Fiji Islands" or "Vanuatu region"
+_REGION_NOISE = (
+    r'^(?i:(?:north|south|east|west)(?:east|west)? of (?:the )?|off the (?:\w+ )?coast of (?:the )?)?'
+    r'(?:(?:northern|southern|central|eastern|western) (?=[A-Z][a-z]+$))?| region$'
+)
+
+US_STATES = {
+    'AK': 'Alaska', 'AL': 'Alabama', 'AR': 'Arkansas', 'AZ': 'Arizona', 'CA': 'California', 'CO': 'Colorado',
+    'CT': 'Connecticut', 'DE': 'Delaware', 'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'IA': 'Iowa',
+    'ID': 'Idaho', 'IL': 'Illinois', 'IN': 'Indiana', 'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana',
+    'MA': 'Massachusetts', 'MD': 'Maryland', 'ME': 'Maine', 'MI': 'Michigan', 'MN': 'Minnesota',
+    'MO': 'Missouri', 'MS': 'Mississippi', 'MT': 'Montana', 'NC': 'North Carolina', 'ND': 'North Dakota',
+    'NE': 'Nebraska', 'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NV': 'Nevada',
+    'NY': 'New York', 'OH': 'Ohio', 'OK': 'Oklahoma', 'OR': 'Oregon', 'PA': 'Pennsylvania', 'PR': 'Puerto Rico',
+    'RI': 'Rhode Island', 'SC': 'South Carolina', 'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas',
+    'UT': 'Utah', 'VA': 'Virginia', 'VT': 'Vermont', 'WA': 'Washington', 'WI': 'Wisconsin',
+    'WV': 'West Virginia', 'WY': 'Wyoming',
+}
+
+# other spellings used by the USGS for the same region
+REGION_ALIASES = {
+    'MX': 'Mexico',
+    'B.C.': 'Mexico',
+    'Fiji Islands': 'Fiji',
+    'Gulf of Alaska': 'Alaska',
+    'South Georgia and the South Sandwich Islands': 'South Georgia and South Sandwich Islands',
+}
+
+@functools.lru_cache(maxsize=None)
+def normalize_region(region):
+    """Map a region abbreviation or alias (like `'CA'`) to its full name (`'California'`)."""
+    return US_STATES.get(region) or REGION_ALIASES.get(region, region)
+
+def parse_places(place):
+    """
+    Split a `pandas.Series` of place descriptions into `distance_km`, `bearing`, `locality` and `region`.
+
+    Each distinct description is parsed once with a vectorized regex and the results are
+    broadcast back to every row, so cost grows with the number of distinct places rather than
+    the number of events. `region` is normalized (e.g. `'CA'` becomes `'California'`) so it
+    matches the `parsed_place` column of `data/earthquakes.csv`.
+    """
+    codes, uniques = pd.factorize(place)
+    parts = pd.Series(uniques, dtype=object).str.extract(_PLACE_PATTERN)
+    parts['distance_km'] = pd.to_numeric(parts.distance_km)
+
+    # descriptions without a comma (like "South of Tonga") name the region as the locality
+    region = parts.region.fillna(parts.locality).str.strip().str.replace(_REGION_NOISE, '', regex=True)
+    parts['region'] = region.map(normalize_region)
+
+    # add an all-missing row for missing places (code -1) and broadcast back to every event
+    parts.loc[len(parts)] = np.nan
+    parsed = parts.iloc[np.where(codes < 0, len(uniques), codes)]
+    parsed.index = place.index
+    return parsed
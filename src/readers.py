@@ -0,0 +1,213 @@
+"""Functions for reading local data files quickly, caching parsed results between runs."""
+
+import collections
+import hashlib
+import importlib.util
+import json
+import pathlib
+import re
+
+import pandas as pd
+
+# parquet needs pyarrow (or fastparquet); without it the cache falls back to pickle
+_PARQUET_AVAILABLE = any(importlib.util.find_spec(name) for name in ('pyarrow', 'fastparquet'))
+
+def _excel_engine():
+    """Use calamine (a Rust reader) when it is installed, otherwise openpyxl in read-only mode."""
+    return 'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl'
+
+def _file_key(path, hash_contents=False):
+    """Identify a version of a file by its size and mtime (or by its contents)."""
+    path = pathlib.Path(path)
+    if hash_contents:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    stat = path.stat()
+    return f'{stat.st_size}-{stat.st_mtime_ns}'
+
+def _cache_path(path, options, cache_dir=None, hash_contents=False):
+    """Path of the cached copy of `path` read with `options`."""
+    path = pathlib.Path(path).resolve()
+    cache_dir = pathlib.Path(cache_dir) if cache_dir else path.parent / '.cache'
+    key = json.dumps([str(path), _file_key(path, hash_contents), options], sort_keys=True, default=str)
+    suffix = '.parquet' if _PARQUET_AVAILABLE else '.pkl'
+    return cache_dir / f'{path.stem}-{hashlib.sha256(key.encode()).hexdigest()[:16]}{suffix}'
+
+def _read_cache(cache_path):
+    if cache_path.suffix == '.parquet':
+        return pd.read_parquet(cache_path)
+    return pd.read_pickle(cache_path)
+
+def _write_cache(df, cache_path):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    if cache_path.suffix == '.parquet':
+        try:
+            df.to_parquet(cache_path)
+            return
+        except (TypeError, ValueError, ImportError):
+            # mixed-type object columns can't be stored as parquet; pickle handles anything
+            cache_path = cache_path.with_suffix('.pkl')
+    df.to_pickle(cache_path)
+
+def cached_read(reader, path, cache_dir=None, hash_contents=False, **kwargs):
+    """
+    Read `path` with `reader(path, **kwargs)`, reusing a cached copy if the file hasn't changed.
+
+    The cache is keyed by the file's size and modification time (or a hash of its contents
+    with `hash_contents=True`) along with the reader and its arguments.
+    """
+    options = {'reader': getattr(reader, '__name__', repr(reader)), **kwargs}
+    cache_path = _cache_path(path, options, cache_dir=cache_dir, hash_contents=hash_contents)
+    for candidate in (cache_path, cache_path.with_suffix('.pkl')):
+        if candidate.exists():
+            return _read_cache(candidate)
+
+    df = reader(path, **kwargs)
+    _write_cache(df, cache_path)
+    return df
+
+def read_excel(path, sheet_name=0, usecols=None, cache=True, cache_dir=None, **kwargs):
+    """
+    Read a sheet of an Excel workbook, only parsing the `usecols` columns.
+
+    The sheet is read with the fastest engine available and, with `cache=True`, stored in
+    columnar form so that later reads of the unchanged workbook skip Excel parsing entirely.
+    """
+    kwargs = {'sheet_name': sheet_name, 'usecols': usecols, 'engine': kwargs.pop('engine', _excel_engine()), **kwargs}
+    if not cache:
+        return pd.read_excel(path, **kwargs)
+    return cached_read(pd.read_excel, path, cache_dir=cache_dir, **kwargs)
+
+# formats in order of how cheap they are to parse
+_READERS = {
+    '.parquet': pd.read_parquet,
+    '.csv': pd.read_csv,
+    '.json': pd.read_json,
+    '.xlsx': read_excel,
+    '.xls': read_excel,
+}
+
+# the most recently parsed datasets by content hash, for `read_dataset(cache=True)`
+_LOADED = collections.OrderedDict()
+_MAX_LOADED = 8
+
+# dates inferred with `parse_dates=True` need at least a year, month and day (not just a year like '2019')
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+def find_sources(path):
+    """
+    List the files holding the dataset at `path`, cheapest format first.
+
+    `path` can be a file, a path without an extension (`'data/food-waste-pilot/food-waste-pilot'`),
+    or a directory containing files named after it.
+    """
+    path = pathlib.Path(path)
+    if path.suffix.lower() in _READERS:
+        return [path]
+    stem = path / path.name if path.is_dir() else path
+    return [stem.with_suffix(suffix) for suffix in _READERS if stem.with_suffix(suffix).exists()]
+
+def _parse_dates(df, parse_dates):
+    """Convert `parse_dates` columns (or, if True, every ISO-formatted string column) to datetimes."""
+    if parse_dates is True:
+        columns = [
+            column for column in df.columns
+            if pd.api.types.infer_dtype(df[column], skipna=True) == 'string'
+            and df[column].dropna().str.match(_ISO_DATE).all()
+        ]
+        strict = False
+    else:
+        columns, strict = list(parse_dates or []), True
+
+    for column in columns:
+        parsed = pd.to_datetime(df[column], format='ISO8601', errors='raise' if strict else 'coerce')
+        if strict or parsed.notna().sum() == df[column].notna().sum():
+            df[column] = parsed
+    return df
+
+def read_dataset(path, parse_dates=True, cache=False, **kwargs):
+    """
+    Read a dataset from the cheapest of the formats it is available in, parsing dates as it loads.
+
+    With `cache=True`, the last few parsed datasets are kept in memory by a hash of the file's
+    contents, so reading a byte-identical copy of a file that was already read returns a copy
+    of the earlier result instead of parsing again.
+    """
+    sources = find_sources(path)
+    if not sources:
+        raise FileNotFoundError(f'No supported data file found for {path}')
+    source = sources[0]
+
+    if not cache:
+        return _parse_dates(_READERS[source.suffix.lower()](source, **kwargs), parse_dates)
+
+    key = (_file_key(source, hash_contents=True), json.dumps([parse_dates, kwargs], sort_keys=True, default=str))
+    if key in _LOADED:
+        _LOADED.move_to_end(key)
+    else:
+        _LOADED[key] = _parse_dates(_READERS[source.suffix.lower()](source, **kwargs), parse_dates)
+        if len(_LOADED) > _MAX_LOADED:
+            _LOADED.popitem(last=False)
+    return _LOADED[key].copy()
+
+# whitespace and commas between the records of a JSON array
+_SEPARATOR = re.compile(r'[\s,]*')
+
+def _typed_frame(records, columns=None, dtype=None, parse_dates=None):
+    """Build a dataframe from a batch of records, applying the requested types."""
+    df = pd.DataFrame.from_records(records, columns=columns)
+    if dtype:
+        df = df.astype(dtype)
+    return _parse_dates(df, parse_dates)
+
+def iter_json(path, chunksize=10_000, columns=None, dtype=None, parse_dates=None, lines=False, block_size=1 << 20):
+    """
+    Read a JSON array of records (or JSON Lines, with `lines=True`) as dataframes of `chunksize` rows.
+
+    The file is read `block_size` characters at a time and each record is decoded as soon as it
+    is complete, so memory use depends on `chunksize` rather than on the size of the file.
+    """
+    if lines:
+        for chunk in pd.read_json(path, lines=True, chunksize=chunksize):
+            # select the columns like `_typed_frame()` does for arrays (missing ones are all NaN)
+            chunk = chunk if columns is None else chunk.reindex(columns=columns)
+            yield _parse_dates(chunk.astype(dtype) if dtype else chunk, parse_dates)
+        return
+
+    decoder = json.JSONDecoder()
+    records = []
+    with open(path, encoding='utf-8-sig') as file:
+        buffer, pos, eof = file.read(block_size).lstrip(), 0, False
+        if not buffer.startswith('['):
+            raise ValueError(f'{path} does not contain a JSON array of records')
+        pos = 1
+
+        while True:
+            pos = _SEPARATOR.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']':
+                break
+
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError('Incomplete record', buffer, pos)
+                if buffer[pos] != '{':
+                    raise ValueError(f'Expected a JSON object at character {pos} of {path}')
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # the record continues past the end of the buffer, so read another block
+                if eof:
+                    raise
+                more = file.read(block_size)
+                buffer, pos, eof = buffer[pos:] + more, 0, not more
+                continue
+
+            records.append(record)
+            if len(records) == chunksize:
+                yield _typed_frame(records, columns, dtype, parse_dates)
+                records = []
+
+    if records:
+        yield _typed_frame(records, columns, dtype, parse_dates)
@@ -0,0 +1,112 @@
+"""Functions for reshaping long format data to wide format (and back) without repeated reallocation."""
+
+import numpy as np
+import pandas as pd
+
+class PivotLayout:
+    """
+    Cell position of every row of long format data in the equivalent wide format grid.
+
+    The (index, columns) keys are factorized once, so any number of value columns
+    can be pivoted by scattering them straight into a preallocated array.
+    """
+
+    def __init__(self, index, columns, index_name=None, columns_name=None):
+        # factorize the keys once; the codes are the row/column of each long row
+        self.row_codes, self.index = pd.factorize(np.asarray(index), sort=True)
+        self.col_codes, self.columns = pd.factorize(np.asarray(columns), sort=True)
+        if (self.row_codes < 0).any() or (self.col_codes < 0).any():
+            raise ValueError('Index and columns cannot contain missing values')
+        self.index = pd.Index(self.index, name=index_name)
+        self.columns = pd.Index(self.columns, name=columns_name)
+        self.shape = (len(self.index), len(self.columns))
+
+        # flat position of each long row in a row-major wide grid
+        self.positions = self.row_codes * self.shape[1] + self.col_codes
+        if np.bincount(self.positions, minlength=self.shape[0] * self.shape[1]).max(initial=0) > 1:
+            raise ValueError('Index contains duplicate entries, cannot reshape')
+
+        # and in the column-major grids the values are scattered into
+        self.column_positions = self.col_codes * self.shape[0] + self.row_codes
+
+        # dense data already sorted by (index, columns) is the wide grid in row-major order
+        self.is_dense = len(self.positions) == self.shape[0] * self.shape[1]
+        self.is_ordered = self.is_dense and np.array_equal(self.positions, np.arange(len(self.positions)))
+
+    @classmethod
+    def from_frame(cls, df, index, columns):
+        """Build the layout from the `index` and `columns` columns of a long format dataframe."""
+        return cls(df[index].to_numpy(), df[columns].to_numpy(), index_name=index, columns_name=columns)
+
+    def _scatter(self, values, fill_value, copy=True):
+        """Place a 1D array of long values into a (rows, columns) array."""
+        values = np.asarray(values)
+        if self.is_ordered:
+            # no scattering needed: the long values already are the wide grid
+            grid = values.reshape(self.shape)
+            return np.asfortranarray(grid) if copy else grid
+
+        # column-major like the blocks pandas stores, so the frame (and `melt()`) uses the grid as is
+        dtype = values.dtype if self.is_dense else np.result_type(values.dtype, np.min_scalar_type(fill_value))
+        grid = np.full(self.shape, fill_value, dtype=dtype, order='F')
+        grid.ravel(order='F')[self.column_positions] = values
+        return grid
+
+    def pivot(self, df, values, fill_value=np.nan, copy=True):
+        """
+        Pivot one or more value columns of `df` using the precomputed cell positions.
+
+        A single column name returns the same frame as `df.pivot()`; a list of names returns
+        hierarchical columns of (value, column) like `df.pivot()` does. With `copy=False`, a
+        single column of data already in wide order is only reshaped, so the result shares
+        memory with `df` and editing one changes the other.
+        """
+        if isinstance(values, str):
+            return pd.DataFrame(
+                self._scatter(df[values].to_numpy(), fill_value, copy=copy),
+                index=self.index, columns=self.columns, copy=False
+            )
+
+        # one (rows, values, columns) array, viewed as (rows, values * columns) for the frame
+        long_values = df[values].to_numpy()
+        n_rows, n_cols = self.shape
+        n_values = len(values)
+        dtype = long_values.dtype if self.is_dense else np.result_type(
+            long_values.dtype, np.min_scalar_type(fill_value)
+        )
+        grid = np.full((n_rows, n_values, n_cols), fill_value, dtype=dtype)
+        flat = grid.ravel()
+        base = self.row_codes * n_values * n_cols + self.col_codes
+        for i in range(n_values):
+            flat[base + i * n_cols] = long_values[:, i]
+
+        columns = pd.MultiIndex.from_product([values, self.columns], names=[None, self.columns.name])
+        return pd.DataFrame(grid.reshape(n_rows, n_values * n_cols), index=self.index, columns=columns, copy=False)
+
+def pivot(df, index, columns, values, layout=None, fill_value=np.nan, copy=True):
+    """Pivot long format data to wide format, reusing `layout` when one is provided."""
+    if layout is None:
+        layout = PivotLayout.from_frame(df, index, columns)
+    return layout.pivot(df, values, fill_value=fill_value, copy=copy)
+
+def melt(wide, var_name='variable', value_name='value'):
+    """
+    Melt a wide format dataframe into long format (one row per cell, column by column).
+
+    When the frame's values are one column-major block (as pandas stores columns added one by
+    one, and as `PivotLayout.pivot()` returns them), they are read as a view of that block.
+    Frames built from a row-major array, such as the output of `DataFrame.pivot()`, have their
+    values copied once into column order.
+    """
+    n_rows, n_cols = wide.shape
+    grid = wide.to_numpy()
+
+    # the transpose of a column-major block is contiguous, so ravel() returns a view (otherwise, a copy)
+    long_values = grid.T.ravel()
+
+    index_name = wide.index.name or 'index'
+    return pd.DataFrame({
+        index_name: np.tile(wide.index.to_numpy(), n_cols),
+        var_name: np.repeat(wide.columns.to_numpy(), n_rows),
+        value_name: long_values,
+    }, copy=False)
@@ -12,6 +12,8 @@ from sklearn.metrics import r2_score
 from statsmodels.distributions.empirical_distribution import ECDF
 from statsmodels.tsa.seasonal import seasonal_decompose
 
+from grouped_stats import box_stats
+
 def _non_symmetric_data():
     """Generate non-symmetric data for plots"""
     # generate data
@@ -320,12 +322,14 @@ def example_boxplot():
     """Generate an example box plot."""
     non_symmetric = _non_symmetric_data()
 
-    # find the quartiles and iqr
-    q1_y, median_y, q3_y = non_symmetric.quantile([0.25, 0.5, 0.75])
-    iqr = q3_y - q1_y
+    # find the quartiles, iqr, whiskers and outliers
+    stats = box_stats(non_symmetric.to_frame(), 'x')[None]
+    q1_y, median_y, q3_y, iqr = (stats[0][key] for key in ('q1', 'med', 'q3', 'iqr'))
 
     # make the boxplot
-    ax = non_symmetric.plot(kind='box', figsize=(6, 6), title='Box plot')
+    _, ax = plt.subplots(figsize=(6, 6))
+    ax.bxp(stats)
+    ax.set_title('Box plot')
 
     # label the box
     ax.annotate('median', xy=(0.945, median_y + 2))
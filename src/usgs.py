@@ -0,0 +1,427 @@
+"""Functions for fetching and caching earthquake data from the USGS API, plus a local server that replays recorded responses."""
+
+import asyncio
+import datetime as dt
+import hashlib
+import http.server
+import json
+import operator
+import pathlib
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from places import parse_places
+
+API = 'https://earthquake.usgs.gov/fdsnws/event/1/query'
+
+# the API rejects queries matching more events than this
+MAX_EVENTS_PER_QUERY = 20000
+
+# windows aren't split below this when they exceed the limit
+_MIN_WINDOW = dt.timedelta(minutes=1)
+
+# responses worth retrying: rate limiting and server-side errors
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# dtypes of the GeoJSON feature properties; anything else is kept as Python objects
+SCHEMA = {
+    'mag': 'float64', 'place': 'object', 'time': 'int64', 'updated': 'int64', 'tz': 'float64',
+    'url': 'object', 'detail': 'object', 'felt': 'float64', 'cdi': 'float64', 'mmi': 'float64',
+    'alert': 'object', 'status': 'object', 'tsunami': 'int64', 'sig': 'int64', 'net': 'object',
+    'code': 'object', 'ids': 'object', 'sources': 'object', 'types': 'object', 'nst': 'float64',
+    'dmin': 'float64', 'rms': 'float64', 'gap': 'float64', 'magType': 'object', 'type': 'object',
+    'title': 'object',
+}
+
+def _column(values, dtype):
+    """
+    Convert an array of property values to an array of `dtype`, widening integers with missing values
+    and keeping values that don't fit the type (e.g. unexpected strings) as Python objects.
+    """
+    if dtype == 'object':
+        return np.array(values, dtype=object)
+    try:
+        return np.array(values, dtype=dtype)
+    except TypeError:
+        # None can't be stored in an integer array
+        try:
+            return np.array(values, dtype='float64')
+        except (TypeError, ValueError):
+            return np.array(values, dtype=object)
+    except ValueError:
+        return np.array(values, dtype=object)
+
+def _property_rows(properties, schema):
+    """
+    The names of all properties, in order of first appearance, and a tuple of their values
+    per feature (`None` where a feature lacks a property).
+    """
+    # usually every feature has the same properties, so one getter per feature collects them
+    names = list(properties[0]) if properties else list(schema)
+    try:
+        rows = list(map(operator.itemgetter(*names), properties))
+        complete = set(map(len, properties)) <= {len(names)}
+    except (KeyError, TypeError):
+        # a feature lacks some of the first one's properties (or the first one has none)
+        complete = False
+    if not complete:
+        names = list(dict.fromkeys(name for props in properties for name in props))
+        rows = [tuple(map(props.get, names)) for props in properties]
+    elif len(names) == 1:
+        rows = [(value,) for value in rows]
+    return names, rows
+
+def _property_columns(names, rows, schema):
+    """Convert the rows of property values to one array per property."""
+    dtypes = [schema.get(name, 'object') for name in names]
+    try:
+        # a structured array casts every row straight to the schema's types in one pass
+        records = np.array(rows, dtype=[(str(i), dtype) for i, dtype in enumerate(dtypes)])
+        return {name: records[str(i)] for i, name in enumerate(names)}
+    except (TypeError, ValueError):
+        # missing integers or values of the wrong type: cast column by column from Python objects
+        table = np.empty((len(rows), len(names)), dtype=object)
+        if rows:
+            table[:] = rows
+        return {name: _column(values, dtype) for name, values, dtype in zip(names, table.T, dtypes)}
+
+def flatten_features(feature_collection, schema=SCHEMA):
+    """
+    Convert a GeoJSON FeatureCollection of earthquakes into a dataframe in columnar form.
+
+    Each property becomes one typed column (`schema` sets the dtypes), alongside the event `id`
+    and the `longitude`, `latitude` and `depth` from each feature's geometry. The properties of
+    all features are gathered in one pass and cast to their types together, so no intermediate
+    dictionary is built per row.
+    """
+    features = feature_collection['features']
+    properties = list(map(operator.itemgetter('properties'), features))
+
+    columns = {'id': np.array([feature.get('id') for feature in features], dtype=object)}
+    columns.update(_property_columns(*_property_rows(properties, schema), schema))
+
+    try:
+        coordinates = np.array([feature['geometry']['coordinates'] for feature in features], dtype='float64')
+    except (KeyError, TypeError, ValueError):
+        # events without a geometry get NaN coordinates
+        coordinates = np.array(
+            [(feature.get('geometry') or {}).get('coordinates') or (None, None, None) for feature in features],
+            dtype='float64'
+        )
+    columns['longitude'], columns['latitude'], columns['depth'] = coordinates.reshape(len(features), 3).T
+
+    return pd.DataFrame(columns, copy=False)
+
+def date_windows(start, end, window=dt.timedelta(days=7)):
+    """
+    Split the time range from `start` to `end` into consecutive `(start, end)` windows of at most `window`.
+
+    The bounds are returned as timestamps (dates become midnight), so windows can be split below a day.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+def _get(session, api, params, retries, backoff, timeout, headers=None):
+    """Send a GET request, retrying failed requests with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(api, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            if response.status_code not in _RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                return response
+        time.sleep(backoff * 2 ** attempt)
+
+def _over_limit(error):
+    """Whether the API rejected a query for matching more events than it returns at once."""
+    return (
+        error.response is not None and error.response.status_code == 400
+        and 'exceeds search limit' in error.response.text
+    )
+
+def _fetch_window(session, api, params, retries, backoff, timeout, cache=None):
+    """Request one window of events, through `cache` when one is provided."""
+    if cache is None:
+        return _get(session, api, params, retries, backoff, timeout).json()
+    return cache.fetch(api, params, lambda headers: _get(session, api, params, retries, backoff, timeout, headers))
+
+class ResponseCache:
+    """
+    On-disk cache of API responses keyed by the query parameters.
+
+    Responses younger than `ttl` are returned without a request; older ones are revalidated
+    with `If-None-Match`/`If-Modified-Since`, so an unchanged result costs a 304 instead of a
+    full download.
+    """
+
+    def __init__(self, cache_dir, ttl=dt.timedelta(hours=1)):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.ttl = ttl
+
+    def _paths(self, api, params):
+        key = json.dumps([api, params], sort_keys=True, default=str)
+        stem = self.cache_dir / hashlib.sha256(key.encode()).hexdigest()
+        return stem.with_suffix('.json'), stem.with_suffix('.meta.json')
+
+    def fetch(self, api, params, send):
+        """Return the JSON response for `params`, calling `send(headers)` to make a request only when needed."""
+        body_path, meta_path = self._paths(api, params)
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() and body_path.exists() else None
+        now = dt.datetime.now(dt.timezone.utc)
+
+        if meta and now - dt.datetime.fromisoformat(meta['fetched_at']) < self.ttl:
+            return json.loads(body_path.read_text())
+
+        headers = {}
+        if meta and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta and meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        response = send(headers)
+        if response.status_code == 304 and meta:
+            body = json.loads(body_path.read_text())
+        else:
+            body = response.json()
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            body_path.write_text(response.text)
+
+        meta_path.write_text(json.dumps({
+            'fetched_at': now.isoformat(),
+            'etag': response.headers.get('ETag', meta and meta.get('etag')),
+            'last_modified': response.headers.get('Last-Modified', meta and meta.get('last_modified')),
+        }))
+        return body
+
+async def fetch_earthquakes_async(
+    start, end, api=API, window=dt.timedelta(days=7), concurrency=4, retries=3, backoff=0.5, timeout=30, cache=None,
+    **params
+):
+    """
+    Fetch every earthquake from `start` to `end` as a dataframe (see `flatten_features()`).
+
+    The range is split into windows small enough to stay under the API's per-query limit,
+    and up to `concurrency` windows are requested at once over a shared connection pool.
+    Features are collected as each window arrives, in whatever order the windows finish.
+    Windows the API rejects for matching too many events are split in half and retried, and
+    if any window fails, the others are cancelled.
+    Pass a `ResponseCache` as `cache` to reuse responses from earlier runs.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    # leaving the executor's block waits for its threads, so the session is only closed once no request uses it
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # one connection per concurrent request, reused across windows
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        async def fetch(window_start, window_end):
+            try:
+                async with semaphore:
+                    response = await loop.run_in_executor(
+                        executor, _fetch_window, session, api,
+                        {
+                            'format': 'geojson', **params,
+                            'starttime': window_start.isoformat(), 'endtime': window_end.isoformat(),
+                        },
+                        retries, backoff, timeout, cache
+                    )
+            except requests.HTTPError as error:
+                middle = window_start + (window_end - window_start) / 2
+                if not _over_limit(error) or window_end - window_start <= _MIN_WINDOW or middle == window_start:
+                    raise
+                # too many events for one query: fetch each half of the window separately
+                halves = await asyncio.gather(fetch(window_start, middle), fetch(middle, window_end))
+                return [feature for half in halves for feature in half]
+            return response['features']
+
+        tasks = [asyncio.create_task(fetch(*bounds)) for bounds in date_windows(start, end, window)]
+        features = []
+        try:
+            for task in asyncio.as_completed(tasks):
+                features.extend(await task)
+        except BaseException:
+            # stop the other windows; requests already running in a thread can't be interrupted
+            # and finish when the executor shuts down
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    # `endtime` is inclusive, so events on the boundary between two windows are returned twice
+    seen = set()
+    unique = []
+    for feature in features:
+        key = feature.get('id')
+        if key is None or key not in seen:
+            seen.add(key)
+            unique.append(feature)
+    return flatten_features({'features': unique})
+
+def fetch_earthquakes(start, end, **kwargs):
+    """
+    Blocking wrapper around `fetch_earthquakes_async()`.
+
+    Inside a running event loop (e.g. a Jupyter notebook), the coroutine runs on its own
+    event loop in a worker thread, since `asyncio.run()` can't be nested.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fetch_earthquakes_async(start, end, **kwargs))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, fetch_earthquakes_async(start, end, **kwargs)).result()
+
+def update_store(path, api=API, **kwargs):
+    """
+    Fetch only the events updated since the last `updated` (or `time`) value in the CSV/Parquet
+    store at `path` and merge them in, replacing older versions of the same events.
+
+    The time range and `updatedafter` change on every call, so a `ResponseCache` wouldn't be
+    reused here; it only helps when fetching the same fixed range again.
+    """
+    path = pathlib.Path(path)
+    read, write = (pd.read_parquet, pd.DataFrame.to_parquet) if path.suffix == '.parquet' else (
+        pd.read_csv, lambda df, path: df.to_csv(path, index=False)
+    )
+    stored = read(path)
+    last = stored['updated' if 'updated' in stored else 'time'].max()
+
+    # revisions can touch any stored event, so search the whole stored time range; only a few events
+    # are updated at a time, so one query covers it (and is split if it ever matches too many)
+    start = pd.to_datetime(stored.time.min(), unit='ms')
+    end = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    new = fetch_earthquakes(
+        start, end, api=api, window=end - start, updatedafter=pd.to_datetime(last, unit='ms').isoformat(), **kwargs
+    )
+
+    if 'parsed_place' in stored and 'place' in new:
+        new['parsed_place'] = parse_places(new.place).region
+
+    # events are identified by id when the store has one, otherwise by time and place
+    key = ['id'] if 'id' in stored else ['time', 'place']
+    merged = pd.concat([stored, new[new.columns.intersection(stored.columns)]], ignore_index=True)
+    merged = merged.drop_duplicates(subset=key, keep='last').sort_values('time', ignore_index=True)
+    write(merged, path)
+    return merged
+
+def features_from_frame(df):
+    """Build a GeoJSON FeatureCollection from earthquake properties (like `data/earthquakes.csv`) for replaying."""
+    records = df.to_dict(orient='records')
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'properties': record, 'geometry': None, 'id': f'replay{i}'}
+            for i, record in enumerate(records)
+        ],
+    }
+
+class _ReplayHandler(http.server.BaseHTTPRequestHandler):
+    """Answer `/query` requests from the server's recorded features, filtered by time like the real API (both ends inclusive)."""
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if not url.path.endswith('/query'):
+            self.send_error(404)
+            return
+
+        features = self.server.features
+        try:
+            if 'starttime' in query:
+                start = pd.Timestamp(query['starttime']).value // 10**6
+                features = [feature for feature in features if feature['properties']['time'] >= start]
+            if 'endtime' in query:
+                end = pd.Timestamp(query['endtime']).value // 10**6
+                features = [feature for feature in features if feature['properties']['time'] <= end]
+            if 'updatedafter' in query:
+                updated = pd.Timestamp(query['updatedafter']).value // 10**6
+                features = [
+                    feature for feature in features
+                    if feature['properties'].get('updated', feature['properties']['time']) > updated
+                ]
+        except ValueError:
+            self.send_error(400, 'Bad time format')
+            return
+
+        if len(features) > self.server.max_events:
+            self.send_error(400, f'{len(features)} matching events exceeds search limit of {self.server.max_events}')
+            return
+
+        body = json.dumps({
+            'type': 'FeatureCollection',
+            'metadata': {'count': len(features), 'status': 200},
+            'features': features,
+        }).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep the replay server quiet."""
+
+class ReplayServer:
+    """
+    Local stand-in for the USGS API serving recorded GeoJSON, for testing and benchmarking offline.
+
+    Use it as a context manager and point the client at its `api` URL:
+
+        with ReplayServer('recorded.geojson') as server:
+            df = fetch_earthquakes(start, end, api=server.api)
+    """
+
+    def __init__(self, recorded, host='127.0.0.1', port=0, max_events=MAX_EVENTS_PER_QUERY):
+        if not isinstance(recorded, dict):
+            with open(recorded, encoding='utf-8') as file:
+                recorded = json.load(file)
+        self._server = http.server.ThreadingHTTPServer((host, port), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.features = recorded['features']
+        self._server.max_events = max_events
+        self._thread = None
+
+    @property
+    def api(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/fdsnws/event/1/query'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()